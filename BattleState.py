@@ -0,0 +1,322 @@
+import sys
+import time
+from array import array
+from ShowdownProtocol import Switch, HpChange, Status, Boost, ClearBoosts, Faint, Weather, SideCondition, Turn, \
+    parse_log, parse_hp, read_battle_log
+
+BOOST_STATS = ("atk", "def", "spa", "spd", "spe", "accuracy", "evasion")
+BOOST_INDEX = {name: index for index, name in enumerate(BOOST_STATS)}
+BOOST_NAMES = ("Atk", "Def", "SpA", "SpD", "Spe", "Acc", "Eva")     # Shown in PokemonState.describe
+MAX_LAYERS = {"Spikes": 3, "Toxic Spikes": 2}     # Side conditions that stack, every other one has one layer
+
+_MISSING = object()     # Old value of a dict key that wasn't there, undoing it deletes the key
+
+
+class PokemonState:
+    """
+    What's known about one pokemon in a battle
+    -----
+    nickname: string
+        - Nickname it's known by in the protocol
+    species: string
+        - Showdown species name like "Garchomp"
+    """
+    __slots__ = ("nickname", "species", "hp", "max_hp", "status", "boosts")
+
+    def __init__(self, nickname, species):
+        self.nickname = nickname
+        self.species = species
+        self.hp = 100
+        self.max_hp = 100   # Showdown sends the opponent's HP out of 100
+        self.status = ""    # Like "par", "fnt" once fainted
+        self.boosts = array("b", bytes(len(BOOST_STATS)))   # Stages from -6 to 6, in the order of BOOST_STATS
+
+    @property
+    def hp_percent(self):
+        """
+        :return: Float percent of HP left
+        """
+        return 100.0 * self.hp / self.max_hp if self.max_hp else 0.0
+
+    def describe(self):
+        """
+        Gets a short line of the pokemon's HP, status, and boosts for the displays
+        :return: String like "HP 45% PAR +2 Atk -1 Spe"
+        """
+        parts = ["HP {:.0f}%".format(self.hp_percent)]
+        if self.status:
+            parts.append(self.status.upper())
+        parts.extend("{:+d} {}".format(stage, name) for stage, name in zip(self.boosts, BOOST_NAMES) if stage)
+        return " ".join(parts)
+
+
+class SideState:
+    """
+    One player's side of a battle
+    """
+    __slots__ = ("pokemon", "active", "conditions")
+
+    def __init__(self):
+        self.pokemon = {}       # nickname -> PokemonState of every pokemon seen
+        self.active = {}        # position letter -> PokemonState in it
+        self.conditions = {}    # side condition like "Stealth Rock" -> layers
+
+
+class BattleState:
+    """
+    State of a battle built up one protocol event at a time, each in O(1). Every change is made through self.set and
+    self.set_item, which log the old value so the battle can be rewound to any earlier event
+    -----
+    record: boolean
+        - Whether to log changes so the battle can be rewound, running over replays is faster without it
+    """
+
+    def __init__(self, record=True):
+        self.sides = {"p1": SideState(), "p2": SideState()}
+        self.weather = ""
+        self.turn = 0
+        self.record = record
+        self.undo = []          # (target, attribute or key, old value, is a key) of every change, oldest first
+        self.event_marks = []   # Length of self.undo before each event, so one per applied event
+        self.turn_marks = {}    # turn -> number of events applied before it started
+
+        self.handlers = {
+            Switch: self.apply_switch,
+            HpChange: self.apply_hp_change,
+            Status: self.apply_status,
+            Boost: self.apply_boost,
+            ClearBoosts: self.apply_clear_boosts,
+            Faint: self.apply_faint,
+            Weather: self.apply_weather,
+            SideCondition: self.apply_side_condition,
+            Turn: self.apply_turn,
+        }
+
+    def set(self, target, attribute, value):
+        """
+        Sets an attribute, logging the old value
+        :return: None
+        """
+        if self.record:
+            self.undo.append((target, attribute, getattr(target, attribute), False))
+        setattr(target, attribute, value)
+
+    def set_item(self, target, key, value):
+        """
+        Sets an item of a dict or array, logging the old value. value _MISSING deletes a dict key
+        :return: None
+        """
+        if self.record:
+            old = target.get(key, _MISSING) if isinstance(target, dict) else target[key]
+            self.undo.append((target, key, old, True))
+        if value is _MISSING:
+            del target[key]
+        else:
+            target[key] = value
+
+    def apply(self, event):
+        """
+        Applies one protocol event
+        :param event: Event from ShowdownProtocol.parse_line
+        :return: True if the event is one that changes the battle state, else False
+        """
+        handler = self.handlers.get(type(event))
+        if handler is None:
+            return False
+        if self.record:
+            self.event_marks.append(len(self.undo))
+        handler(event)
+        return True
+
+    def snapshot(self):
+        """
+        Gets a point the battle can be rewound to
+        :return: Int number of events applied so far
+        """
+        return len(self.event_marks)
+
+    def rewind(self, position):
+        """
+        Undoes every event applied after a snapshot, the work is the number of changes undone
+        :param position: Int from self.snapshot
+        :return: None
+        """
+        if not self.record:
+            raise ValueError("BattleState made with record=False can't be rewound")
+        if position < len(self.event_marks):
+            mark = self.event_marks[position]
+            del self.event_marks[position:]
+            while len(self.undo) > mark:
+                target, key, old, is_item = self.undo.pop()
+                if not is_item:
+                    setattr(target, key, old)
+                elif old is _MISSING:
+                    del target[key]
+                else:
+                    target[key] = old
+
+    def rewind_to_turn(self, turn):
+        """
+        Rewinds the battle to the start of a turn
+        :param turn: Turn number that was applied
+        :return: None
+        """
+        self.rewind(self.turn_marks[turn])
+
+    def find_pokemon(self, side, nickname):
+        """
+        :return: PokemonState of a pokemon seen in the battle, None if it hasn't been
+        """
+        side_state = self.sides.get(side)
+        return side_state.pokemon.get(nickname) if side_state is not None else None
+
+    def active(self, side, position="a"):
+        """
+        :return: PokemonState of the active pokemon in a position, None if there isn't one yet
+        """
+        side_state = self.sides.get(side)
+        return side_state.active.get(position) if side_state is not None else None
+
+    def set_hp(self, pokemon, hp):
+        """
+        Sets a pokemon's HP and status from the protocol's HP text
+        :param pokemon: PokemonState
+        :param hp: HP like "45/100 par"
+        :return: None
+        """
+        current, maximum, status = parse_hp(hp)
+        if current != pokemon.hp:
+            self.set(pokemon, "hp", current)
+        if maximum is not None and maximum != pokemon.max_hp:
+            self.set(pokemon, "max_hp", maximum)
+        if status != pokemon.status:
+            self.set(pokemon, "status", status)
+
+    def reset_boosts(self, pokemon, negative_only=False):
+        """
+        Clears a pokemon's boosts, like when it switches out
+        :return: None
+        """
+        for index, stage in enumerate(pokemon.boosts):
+            if stage < 0 or (stage > 0 and not negative_only):
+                self.set_item(pokemon.boosts, index, 0)
+
+    def apply_switch(self, event):
+        side = self.sides.get(event.side)
+        if side is None:
+            return
+        pokemon = side.pokemon.get(event.nickname)
+        if pokemon is None:
+            pokemon = PokemonState(event.nickname, event.species)
+            self.set_item(side.pokemon, event.nickname, pokemon)
+        elif pokemon.species != event.species:  # Forme changes
+            self.set(pokemon, "species", event.species)
+
+        if event.kind != "replace":     # Illusion being broken, the pokemon didn't really switch
+            previous = side.active.get(event.position)
+            if previous is not None and previous is not pokemon:
+                self.reset_boosts(previous)
+        self.set_item(side.active, event.position, pokemon)
+        if event.hp:
+            self.set_hp(pokemon, event.hp)
+
+    def apply_hp_change(self, event):
+        pokemon = self.find_pokemon(event.side, event.nickname)
+        if pokemon is not None:
+            self.set_hp(pokemon, event.hp)
+
+    def apply_status(self, event):
+        pokemon = self.find_pokemon(event.side, event.nickname)
+        if pokemon is not None and pokemon.status != event.status:
+            self.set(pokemon, "status", event.status)
+
+    def apply_boost(self, event):
+        pokemon = self.find_pokemon(event.side, event.nickname)
+        index = BOOST_INDEX.get(event.stat)
+        if pokemon is None or index is None:
+            return
+        stage = event.amount if event.kind == "set" else pokemon.boosts[index] + event.amount
+        stage = max(-6, min(6, stage))
+        if stage != pokemon.boosts[index]:
+            self.set_item(pokemon.boosts, index, stage)
+
+    def apply_clear_boosts(self, event):
+        if event.side is None:
+            for side in self.sides.values():
+                for pokemon in side.active.values():
+                    self.reset_boosts(pokemon)
+        else:
+            pokemon = self.find_pokemon(event.side, event.nickname)
+            if pokemon is not None:
+                self.reset_boosts(pokemon, event.negative_only)
+
+    def apply_faint(self, event):
+        pokemon = self.find_pokemon(event.side, event.nickname)
+        if pokemon is not None:
+            if pokemon.hp != 0:
+                self.set(pokemon, "hp", 0)
+            if pokemon.status != "fnt":
+                self.set(pokemon, "status", "fnt")
+
+    def apply_weather(self, event):
+        if event.weather != self.weather:
+            self.set(self, "weather", event.weather)
+
+    def apply_side_condition(self, event):
+        side = self.sides.get(event.side)
+        if side is None:
+            return
+        layers = side.conditions.get(event.condition, 0)
+        if event.started:
+            self.set_item(side.conditions, event.condition, min(layers + 1, MAX_LAYERS.get(event.condition, 1)))
+        elif layers:
+            self.set_item(side.conditions, event.condition, _MISSING)
+
+    def apply_turn(self, event):
+        if self.record:
+            self.set_item(self.turn_marks, event.number, len(self.event_marks) - 1)
+        self.set(self, "turn", event.number)
+
+
+def benchmark_replays(paths, record=False):
+    """
+    Runs the battle state over saved replays with nothing else running, timing parsing and applying events apart
+    :param paths: Replay files or folders of them
+    :param record: Whether to log changes for rewinding while applying
+    :return: Dict of the number of battles and events, and events per second for parsing and for applying
+    """
+    from ReplayIngest import find_replays
+    parse_time = 0.0
+    apply_time = 0.0
+    battles = 0
+    events = 0
+    for path in find_replays(paths):
+        try:
+            lines = read_battle_log(path)
+        except (OSError, ValueError):
+            continue
+        start = time.perf_counter()
+        battle_events = list(parse_log(lines))
+        parse_time += time.perf_counter() - start
+
+        state = BattleState(record=record)
+        apply = state.apply
+        start = time.perf_counter()
+        for event in battle_events:
+            apply(event)
+        apply_time += time.perf_counter() - start
+        battles += 1
+        events += len(battle_events)
+    return {"battles": battles, "events": events, "parse_events_per_second": events / max(parse_time, 1e-9),
+            "apply_events_per_second": events / max(apply_time, 1e-9)}
+
+
+if __name__ == "__main__":
+    # Usage: python BattleState.py <replay files or folders>
+    if len(sys.argv) < 2:
+        print("Usage: python BattleState.py <replay files or folders>")
+        sys.exit(1)
+    results = benchmark_replays(sys.argv[1:])
+    print("{battles} battles, {events} events".format(**results))
+    print("Parsing:  {:,.0f} events/s".format(results["parse_events_per_second"]))
+    print("Applying: {:,.0f} events/s".format(results["apply_events_per_second"]))
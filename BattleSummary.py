@@ -0,0 +1,83 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class BattleSummary(tk.Frame):
+    """
+    Compact table with one row per watched battle, showing both players and their active pokemon. Rows are only
+    touched when their battle changes
+    -----
+    parent: Parent frame
+        - The parent of the table
+    on_focus: function
+        - Called with the room ID of a row when it's double clicked, or Enter is pressed on it
+    on_remove: function
+        - Called with the room ID of the selected row when Delete is pressed
+    max_rows_shown: int
+        - Number of rows shown before the table scrolls
+    """
+
+    columns = ("battle", "player_one", "player_one_pokemon", "player_two", "player_two_pokemon", "status")
+    headings = ("Battle", "Player 1", "Active", "Player 2", "Active", "Status")
+    column_widths = (170, 90, 90, 90, 90, 80)
+
+    def __init__(self, parent, on_focus=None, on_remove=None, max_rows_shown=6, **kw):
+        super().__init__(parent, **kw)
+        self.on_focus = on_focus
+        self.on_remove = on_remove
+
+        self.table = ttk.Treeview(self, columns=self.columns, show="headings", height=max_rows_shown,
+                                  selectmode="browse")
+        for column, heading, width in zip(self.columns, self.headings, self.column_widths):
+            self.table.heading(column, text=heading)
+            self.table.column(column, width=width, anchor=tk.W)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.table.yview)
+        self.table.configure(yscrollcommand=self.scrollbar.set)
+
+        self.table.grid(column=1, row=1)
+        self.scrollbar.grid(column=2, row=1, sticky="NS")
+
+        self.table.bind("<Double-Button-1>", lambda event: self.focus_selected())
+        self.table.bind("<Return>", lambda event: self.focus_selected())
+        self.table.bind("<Delete>", lambda event: self.remove_selected())
+
+    def update_rows(self, updates):
+        """
+        Adds, changes, or removes the rows of battles that changed
+        :param updates: Dict of room ID -> summary row from BattleRoom.summary_row, or None to remove the row
+        :return: None
+        """
+        for room, row in updates.items():
+            if row is None:
+                if self.table.exists(room):
+                    self.table.delete(room)
+            elif self.table.exists(room):
+                self.table.item(room, values=row)
+            else:
+                self.table.insert("", tk.END, iid=room, values=row)
+
+    def selected_room(self):
+        """
+        Gets the room ID of the selected row
+        :return: String room ID, None if no row is selected
+        """
+        selection = self.table.selection()
+        return selection[0] if selection else None
+
+    def focus_selected(self):
+        """
+        Calls on_focus with the selected row's room
+        :return: None
+        """
+        room = self.selected_room()
+        if room is not None and self.on_focus is not None:
+            self.on_focus(room)
+
+    def remove_selected(self):
+        """
+        Calls on_remove with the selected row's room
+        :return: None
+        """
+        room = self.selected_room()
+        if room is not None and self.on_remove is not None:
+            self.on_remove(room)
@@ -0,0 +1,281 @@
+import sys
+import time
+import tkinter as tk
+from PIL import ImageTk
+from PokemonDisplay import LookupDisplay, PokemonDisplay
+
+STAT_NAMES = ("HP", "ATK", "DEF", "SPATK", "SPDEF", "SPD")     # In the order of SpeciesRecord.STATS
+STAT_COLORS = ("#ff0000", "#f08030", "#f8d030", "#6890f0", "#78c850", "#f85888")
+
+
+class CanvasPokemonDisplay(LookupDisplay, tk.Canvas):
+    """
+    Shows a pokemon like PokemonDisplay, but draws everything on one canvas instead of about 40 widgets. Every item is
+    made once and changed in place, so showing a pokemon never makes widgets or goes through geometry management
+    -----
+    parent: tk widget
+        - Widget to put the display in
+    app_class: PokeApp
+        - App the display is in
+    poke_api_class: pokepy.V2Client or LocalPokeClient
+        - Kept to match PokemonDisplay, lookups go through app_class.lookups
+    pokemon: string
+        - Pokemon shown first
+    number: tuple
+        - (side, position) slot of the display, used as its lookup slot
+    """
+
+    sprite_size = 96
+    icon_width = 48
+    icon_height = 16
+    row_height = 18
+    stat_bar_width = 100
+    stat_bar_height = 12
+    stat_max_value = 150    # Value to determine what stat would fill the stat bar
+    matchup_x = 200     # Left edge of the weakness column, resistances and immunities are to its right
+
+    def __init__(self, parent, app_class, poke_api_class, pokemon='charizard', number=1, **kw):
+        self.poke_client = poke_api_class
+        self.poke_app = app_class
+        self.frame_number = number
+        self.current_pokemon = pokemon
+        self.pokemon_data = None    # Filled in once the first lookup finishes
+
+        colors = {"bg": self.poke_app.current_bg_color, "fg": self.poke_app.current_fg_color}
+        self.stats_top = self.sprite_size + 4 * self.row_height + 8
+        self.full_height = self.stats_top + len(STAT_NAMES) * self.row_height + 4
+        kw.setdefault("width", self.matchup_x + 3 * (self.icon_width + 8))
+        kw.setdefault("height", self.full_height)
+        super().__init__(parent, bg=kw.pop("bg", colors["bg"]), highlightthickness=0, **kw)
+
+        # Sprite, name, and types
+        left_middle = self.matchup_x // 2
+        self.name_item = self.create_text(left_middle, self.row_height // 2, text=pokemon.capitalize(),
+                                          fill=colors["fg"], tags="text")
+        self.sprite_item = self.create_image(left_middle, self.row_height, anchor=tk.N,
+                                             image=self.poke_app.type_icons.default_sprite)
+        self.sprite_render = None   # Canvas images need a reference kept to them
+        type_y = self.row_height + self.sprite_size + 4
+        self.type_items = (self.create_image(left_middle, type_y, anchor=tk.N, state=tk.HIDDEN),
+                           self.create_image(left_middle + self.icon_width // 2, type_y, anchor=tk.N,
+                                             state=tk.HIDDEN))
+        self.shown_types = ()
+        # HP, status, and boosts of the pokemon in a watched battle, empty until there are any
+        self.battle_status_item = self.create_text(left_middle, type_y + self.icon_height + 4, anchor=tk.N, text="",
+                                                   fill=colors["fg"], tags="text")
+        # Speed range and how it compares to the other side, from StatEngine
+        self.speed_tier_item = self.create_text(left_middle, type_y + self.icon_height + self.row_height + 4,
+                                                anchor=tk.N, text="", fill=colors["fg"], tags="text")
+
+        # Weakness, resistance, and immunity columns, their icon items are made the first time they're needed
+        self.column_titles = {}
+        for column, title in enumerate(("Weak", "Resist", "Immune"), 1):
+            self.column_titles[column] = self.create_text(self.column_x(column), self.row_height // 2, text=title,
+                                                          fill=colors["fg"], tags="text", state=tk.HIDDEN)
+        self.icon_pools = {1: [], 2: [], 3: []}     # column -> image items, shown from the top down
+        self.shown_matchups = {1: (), 2: (), 3: ()}     # column -> tuple of (type, is quad) shown in it
+        self.items_created = 0  # Number of pooled icon items made, stops going up once every column is big enough
+
+        # Stat names, bars, and values
+        self.stat_bars = []
+        self.stat_values = []
+        for row, (stat, color) in enumerate(zip(STAT_NAMES, STAT_COLORS)):
+            y = self.stats_top + row * self.row_height
+            bar_x = 50
+            self.create_text(4, y, text=stat, anchor=tk.NW, fill=colors["fg"], tags=("text", "stats"))
+            self.create_rectangle(bar_x, y, bar_x + self.stat_bar_width, y + self.stat_bar_height,
+                                  fill=colors["fg"], outline=colors["fg"], tags=("bar_background", "stats"))
+            self.stat_bars.append(self.create_rectangle(bar_x, y, bar_x, y + self.stat_bar_height, fill=color,
+                                                        outline="black", tags="stats"))
+            self.stat_values.append(self.create_text(bar_x + self.stat_bar_width + 6, y, text="0", anchor=tk.NW,
+                                                     fill=colors["fg"], tags=("text", "stats")))
+        self.shown_stats = None
+
+        self.request_pokemon(pokemon)
+
+    def column_x(self, column):
+        """
+        Gets the middle of a weakness, resistance, or immunity column
+        :param column: Int column, 1 for weaknesses, 2 for resistances, 3 for immunities
+        :return: Int x
+        """
+        return self.matchup_x + (column - 1) * (self.icon_width + 8) + self.icon_width // 2
+
+    def configure(self, cnf=None, **kw):
+        # fg isn't a canvas option, it's the color of the text so ThemeRegistry can recolor this like a Label
+        fg = kw.pop("fg", None)
+        if fg is not None:
+            self.itemconfigure("text", fill=fg)
+            self.itemconfigure("bar_background", fill=fg, outline=fg)
+            if cnf is None and not kw:
+                return None
+        return super().configure(cnf, **kw)
+
+    config = configure
+
+    def show_battle_status(self, status):
+        """
+        Shows the HP, status, and boosts of the pokemon in a watched battle under its types
+        :param status: Line from BattleState.PokemonState.describe, empty to hide it
+        :return: None
+        """
+        self.itemconfigure(self.battle_status_item, text=status)
+
+    def show_speed_tier(self, speed_tier):
+        """
+        Shows the pokemon's speed range and how it compares to the other side under its battle status
+        :param speed_tier: Line from StatEngine.StatEngine.describe_speed
+        :return: None
+        """
+        self.itemconfigure(self.speed_tier_item, text=speed_tier)
+
+    def render(self, result):
+        """
+        Shows a finished lookup by changing the canvas items in place, items that would look the same are left alone
+        :param result: LookupPipeline.LookupResult without an error
+        :return: None
+        """
+        self.itemconfigure(self.name_item, text=self.current_pokemon.capitalize())
+        self.update_sprite(result.sprite_image)
+        self.update_type_relationships(result.matchups)
+        self.update_stats()
+
+    def update_sprite(self, new_sprite_image):
+        """
+        Changes the sprite
+        :param new_sprite_image: Decoded PIL image of the sprite, None if the pokemon has no sprite
+        :return: None
+        """
+        if new_sprite_image is None:
+            self.sprite_render = self.poke_app.type_icons.no_picture_sprite
+        else:
+            self.sprite_render = ImageTk.PhotoImage(new_sprite_image, master=self)
+        self.itemconfigure(self.sprite_item, image=self.sprite_render)
+
+    def update_type_relationships(self, matchups=None):
+        """
+        Changes the types and the weakness, resistance, and immunity columns
+        :param matchups: Dict from TypeChart.type_matchups for the current pokemon, worked out here if None
+        :return: None
+        """
+        types = self.pokemon_data.type_names
+        if types != self.shown_types:
+            # Two types sit side by side under the sprite, one is centered
+            left_middle = self.matchup_x // 2
+            first_x = left_middle if len(types) == 1 else left_middle - self.icon_width // 2 - 2
+            for i, item in enumerate(self.type_items):
+                if i < len(types):
+                    self.coords(item, first_x + i * (self.icon_width + 4), self.row_height + self.sprite_size + 4)
+                    self.itemconfigure(item, image=self.poke_app.type_icons.icon(types[i]), state=tk.NORMAL)
+                else:
+                    self.itemconfigure(item, state=tk.HIDDEN)
+            self.shown_types = types
+
+        if matchups is None:
+            from TypeChart import type_matchups
+            matchups = type_matchups(types)
+        columns = {
+            1: tuple((x, x in matchups["quad_weaknesses"]) for x in matchups["weaknesses"]),
+            2: tuple((x, x in matchups["quad_resistances"]) for x in matchups["resistances"]),
+            3: tuple((x, False) for x in matchups["immunities"]),
+        }
+        for column, icons in columns.items():
+            shown = self.shown_matchups[column]
+            if icons == shown:
+                continue
+            self.itemconfigure(self.column_titles[column], state=tk.NORMAL if icons else tk.HIDDEN)
+            pool = self.icon_pools[column]
+            while len(pool) < len(icons):
+                pool.append(self.create_image(self.column_x(column), (len(pool) + 1) * self.row_height, anchor=tk.N,
+                                              state=tk.HIDDEN))
+                self.items_created += 1
+            for i, item in enumerate(pool):
+                if i < len(icons):
+                    if i >= len(shown) or shown[i] != icons[i]:
+                        self.itemconfigure(item, image=self.poke_app.type_icons.icon(*icons[i]), state=tk.NORMAL)
+                elif i < len(shown):
+                    self.itemconfigure(item, state=tk.HIDDEN)
+            self.shown_matchups[column] = icons
+
+    def update_stats(self):
+        """
+        Changes the stat bars and values
+        :return: None
+        """
+        stats = tuple(self.pokemon_data.base_stats)
+        if stats == self.shown_stats:
+            return
+        for bar, value, base_stat in zip(self.stat_bars, self.stat_values, stats):
+            x1, y1, __, y2 = self.coords(bar)
+            self.coords(bar, x1, y1, x1 + min(base_stat / self.stat_max_value, 1) * self.stat_bar_width, y2)
+            self.itemconfigure(value, text=str(base_stat))
+        self.shown_stats = stats
+
+    def remove_stat_display(self):
+        """
+        Hides the stats, they're still updated
+        """
+        self.itemconfigure("stats", state=tk.HIDDEN)
+        super().configure(height=self.stats_top)
+
+    def remember_stat_display(self):
+        """
+        Shows the stats again if they're hidden
+        """
+        self.itemconfigure("stats", state=tk.NORMAL)
+        super().configure(height=self.full_height)
+
+
+def benchmark_redraw(app, switches=200):
+    """
+    Times showing pokemon on a widget display against a canvas display, including Tk laying out and drawing them.
+    Lookups are done first, so only showing them is timed
+    :param app: PokeApp to make the displays in
+    :param switches: Number of pokemon shown on each display
+    :return: Dict of the mean and worst milliseconds per switch for each display
+    """
+    results = []
+    for name in app.pokemon_list:
+        pokemon = app.name_index.resolve(name)
+        if pokemon is None:
+            continue
+        try:
+            results.append(app.lookups.fetch(pokemon))
+        except Exception:
+            continue
+        if len(results) == switches:
+            break
+
+    timings = {}
+    for label, display_class in (("widgets", PokemonDisplay), ("canvas", CanvasPokemonDisplay)):
+        display = display_class(app.master, app, app.poke_client, results[0].name, number=label,
+                                bg=app.current_bg_color)
+        display.grid(column=1, row=5)
+        app.root.update()
+        times = []
+        for result in results:
+            start = time.perf_counter()
+            display.show_lookup(result)
+            app.root.update_idletasks()     # Geometry management and drawing happen here
+            times.append(time.perf_counter() - start)
+        display.destroy()
+        timings[label] = (sum(times) / len(times) * 1000, max(times) * 1000)
+
+    return {"switches": len(results),
+            "widgets_mean_ms": timings["widgets"][0], "widgets_worst_ms": timings["widgets"][1],
+            "canvas_mean_ms": timings["canvas"][0], "canvas_worst_ms": timings["canvas"][1]}
+
+
+if __name__ == "__main__":
+    # Usage: python CanvasPokemonDisplay.py [switches]
+    # Shows the same pokemon on both kinds of display and prints how long each switch took
+    from PokeApp import PokeApp
+    from PokeDataStore import DEFAULT_STORE_PATH
+    root = tk.Tk()
+    bench_app = PokeApp(root, data_store=DEFAULT_STORE_PATH)
+    timing = benchmark_redraw(bench_app, int(sys.argv[1]) if len(sys.argv) > 1 else 200)
+    print("{switches} switches".format(**timing))
+    print("Widgets: {widgets_mean_ms:.2f} ms mean, {widgets_worst_ms:.2f} ms worst per switch".format(**timing))
+    print("Canvas:  {canvas_mean_ms:.2f} ms mean, {canvas_worst_ms:.2f} ms worst per switch".format(**timing))
+    bench_app.lookups.shutdown()
+    root.destroy()
@@ -1,4 +1,6 @@
 import tkinter as tk
+from PrefixIndex import PrefixIndex
+from FuzzyIndex import FuzzyIndex
 
 
 class EntryAutoFill(tk.Frame):
@@ -55,6 +57,12 @@ class EntryAutoFill(tk.Frame):
         - Whether the guess window should be shown or not
     alphabetical: boolean
         - Whether guesses should appear alphabetically (True) or in order of the given autocomplete_list (False)
+    fuzzy: boolean
+        - Whether typos should still get guesses when nothing starts with the entry, closest and most recently
+          used first
+    debounce_delay: int
+        - Milliseconds to wait after the last edit before guesses are worked out, so fast typing and pasting only
+          work them out once
     """
 
     def __init__(self, parent, real_root, autocomplete_list, real_width=100, real_height=19,
@@ -63,7 +71,8 @@ class EntryAutoFill(tk.Frame):
                  entry_bg="#FFFFFF", entry_fg="#000000", guess_anchor=tk.CENTER,
                  callback_func=None, cb_if_entry_guess=True, show_guess_window=True,
                  guess_window_bd_color="#000000", guess_window_bd_thickness=0, guess_bd_color="#000000",
-                 guess_bd_thickness=0, entry_take_focus=True, alphabetical=False, **kw):
+                 guess_bd_thickness=0, entry_take_focus=True, alphabetical=False, fuzzy=True,
+                 debounce_delay=30, **kw):
 
         self.real_root = real_root
         self.parent = parent
@@ -78,6 +87,13 @@ class EntryAutoFill(tk.Frame):
         self.autocomplete_list = [i.lower() for i in autocomplete_list]
         if alphabetical:
             self.autocomplete_list.sort()
+        self.autocomplete_index = PrefixIndex(self.autocomplete_list, alphabetical)     # Used to find guesses quickly
+        self.fuzzy_index = FuzzyIndex(self.autocomplete_list) if fuzzy else None    # Used for guesses with typos
+        self.last_guess_entry = ""      # Entry and index range of the last guesses, guesses for an entry that
+        self.last_guess_range = None    # extends it are only looked for in that range
+
+        self.debounce_delay = debounce_delay
+        self.pending_guess_update = None    # after() id of the scheduled self.update_guess, None if none is scheduled
 
         self.entry_width = real_width  # Defines the length of the entry widget in pixels (also guesses)
         self.entry_height = real_height
@@ -111,6 +127,8 @@ class EntryAutoFill(tk.Frame):
 
         self.guess_label_frames = {}  # Dicts store guess frame and labels so they can be easily accessed by a number
         self.guess_window_labels = {}
+        self.guess_label_texts = {}     # Text currently on each guess label, so only changed ones are updated
+        self.guess_rows_shown = max_guesses_shown   # Number of guess frames currently packed
         self.max_guesses_shown = max_guesses_shown
         self.guess_anchor = guess_anchor
         self.guess_selected = -1  # Guess selected -1 means no guess is selected, otherwise goes 0 -> max guesses
@@ -138,6 +156,7 @@ class EntryAutoFill(tk.Frame):
 
             self.guess_window_labels[i].pack(fill=tk.X)  # fill=tk.X makes the label take up their whole frame
             self.guess_label_frames[i].pack()
+            self.guess_label_texts[i] = ""
 
     @staticmethod
     def get_widget_geometry(widget):
@@ -190,12 +209,31 @@ class EntryAutoFill(tk.Frame):
             self.guess_selected = number
             self.highlight_guess(self.guess_selected)
 
+    def schedule_guess_update(self):
+        """
+        Updates the guesses once no edit has been made for self.debounce_delay ms, replacing any update already
+        scheduled
+        :return: None
+        """
+        if self.pending_guess_update is not None:
+            self.after_cancel(self.pending_guess_update)
+        self.pending_guess_update = self.after(self.debounce_delay, self.update_guess)
+
+    def flush_guess_update(self):
+        """
+        Runs a scheduled guess update now, used before anything that reads the guesses
+        :return: None
+        """
+        if self.pending_guess_update is not None:
+            self.after_cancel(self.pending_guess_update)
+            self.update_guess()
+
     def update_guess(self):
         """
-        Updates the current guess for item by iterating through all items and comparing them to what is currently
-        typed
+        Updates the current guess for item by comparing all items to what is currently typed
         :return: True if guess changed, false if guess did not change
         """
+        self.pending_guess_update = None
         if self.show_guess_window:
             guesses = self.guess_input()
             # Makes sure guess stays the same even if spelling doesn't match but doesn't match any other items either
@@ -245,16 +283,20 @@ class EntryAutoFill(tk.Frame):
         # Updates the position of the window
         self.guess_window_frame.place(in_=self.entry, x=-1, y=self.entry_height-1)
 
-        # Updates the text
+        # Updates the text, only of the labels whose text changed
         display_list = self.current_guesses[:self.max_guesses_shown]  # List of items to be displayed
-        count = 0
-        for item in display_list:
-            self.guess_label_frames[count].pack()
-            self.guess_window_labels[count].config(text=item.capitalize(), bg=self.guess_bg, anchor=self.guess_anchor)
-            count += 1
-
-        for i in range(self.max_guesses_shown - count):
-            self.guess_label_frames[self.max_guesses_shown - 1 - i].pack_forget()
+        for count, item in enumerate(display_list):
+            text = item.capitalize()
+            if self.guess_label_texts[count] != text:
+                self.guess_window_labels[count].config(text=text, bg=self.guess_bg, anchor=self.guess_anchor)
+                self.guess_label_texts[count] = text
+
+        # Shows or hides rows at the end so the number shown matches the number of guesses
+        for i in range(self.guess_rows_shown, len(display_list)):
+            self.guess_label_frames[i].pack()
+        for i in range(self.guess_rows_shown - 1, len(display_list) - 1, -1):
+            self.guess_label_frames[i].pack_forget()
+        self.guess_rows_shown = len(display_list)
 
     def hide_guess_window(self):
         """
@@ -293,21 +335,30 @@ class EntryAutoFill(tk.Frame):
 
     def guess_input(self):
         """
-        Guesses the item based on what is currently typed and iterating through all items
-        :return: The guessed item, None if entry doesn't match any items, "empty entry" if entry is empty, "complete
+        Guesses the item based on what is currently typed, using self.autocomplete_index
+        :return: The guessed items, empty if entry doesn't match any items, "empty entry" if entry is empty, "complete
                 entry" if the entry matches an item in the autocomplete list
         """
         entry = self.entry.get().lower()  # Gets entry
         if entry == "":
+            self.last_guess_range = None
             return "empty entry"
-        elif entry in self.autocomplete_list:
-            return "complete entry"
-        entry_len = len(entry)
-        guessed_items = []
-        for item in self.autocomplete_list:  # Looks through entire list of items and return the first item that
-            if item[:entry_len] == entry:  # matches the current entry
-                guessed_items.append(item)
 
+        # If the entry only had characters added, the matches are in the range of the last ones so only that is searched
+        if self.last_guess_range is not None and entry.startswith(self.last_guess_entry):
+            guess_range = self.autocomplete_index.prefix_range(entry, self.last_guess_range)
+        else:
+            guess_range = self.autocomplete_index.prefix_range(entry)
+        self.last_guess_entry = entry
+        self.last_guess_range = guess_range
+
+        if entry in self.autocomplete_index:
+            return "complete entry"
+        # Only the guesses that can be shown are needed, but at least 2 so fill_with_guess can tell if only one matches
+        guess_count = max(self.max_guesses_shown, 2)
+        guessed_items = self.autocomplete_index.range_matches(guess_range, guess_count)
+        if len(guessed_items) == 0 and self.fuzzy_index is not None:    # Nothing starts with entry, may be a typo
+            guessed_items = self.fuzzy_index.search(entry, guess_count)
         return guessed_items
 
     def fill_with_guess(self):
@@ -320,7 +371,7 @@ class EntryAutoFill(tk.Frame):
             main.entry.insert(0, main.current_guesses[main.guess_selected].capitalize())
             main.hide_guess_window()
 
-        if self.entry.get().lower() in self.autocomplete_list:  # If guess entry is full with item name, calls
+        if self.entry.get().lower() in self.autocomplete_index:  # If guess entry is full with item name, calls
             self.callback()                                     # self.callback instead of filling out guess
             return
 
@@ -345,7 +396,7 @@ class EntryAutoFill(tk.Frame):
                 pass
             self.entry.insert(tk.INSERT, event.char)
             self.unselect_guesses()
-            self.update_guess()
+            self.schedule_guess_update()
             self.entry.xview(tk.INSERT)
             return 'break'
         else:
@@ -357,6 +408,7 @@ class EntryAutoFill(tk.Frame):
         :param event:
         :return: 'break' so that when TAB is pressed it doesn't select text
         """
+        self.flush_guess_update()
         if len(self.current_guesses) > 0:
             new_guess = self.guess_selected + 1
             if new_guess > len(self.current_guesses) - 1 or new_guess >= self.max_guesses_shown:
@@ -372,6 +424,7 @@ class EntryAutoFill(tk.Frame):
         :param event: Event given by self.entry.bind
         :return: None
         """
+        self.flush_guess_update()
         if self.show_guess_window:
             if self.callback_if_entry_is_guess:
                 self.fill_with_guess()
@@ -384,7 +437,7 @@ class EntryAutoFill(tk.Frame):
 
     def back_pressed(self, event):
         """
-        Functions as normal backspace, is only here so that self.update_guess() can be called
+        Functions as normal backspace, is only here so that the guesses can be updated
         :param event: Key press event
         :return: 'break' so backspace doesn't delete a word when pressed
         """
@@ -393,7 +446,7 @@ class EntryAutoFill(tk.Frame):
         except tk._tkinter.TclError:  # Else, just backspaces
             self.unselect_guesses()
             self.entry.delete(self.entry.index(tk.INSERT) - 1)
-        self.update_guess()
+        self.schedule_guess_update()
         return 'break'
 
     def delete_pressed(self, event):
@@ -406,7 +459,7 @@ class EntryAutoFill(tk.Frame):
             self.entry.delete(self.entry.index("sel.first"), self.entry.index("sel.last"))
         except tk._tkinter.TclError:  # Else, just deletes
             self.entry.delete(self.entry.index(tk.INSERT))
-        self.update_guess()
+        self.schedule_guess_update()
         return 'break'
 
     def ctrl_backspace(self, event):
@@ -436,7 +489,7 @@ class EntryAutoFill(tk.Frame):
                     deleting = False
 
             self.entry.delete(current_index + 1 if current_index > 0 else 0, starting_index + 1)
-        self.update_guess()
+        self.schedule_guess_update()
         return "break"  # Prevents backspace from deleting a key when pressed
 
     def ctrl_delete(self, event):
@@ -465,7 +518,7 @@ class EntryAutoFill(tk.Frame):
                     deleting = False
 
             self.entry.delete(starting_index, current_index if current_index < len(starting_entry)-1 else tk.END)
-        self.update_guess()
+        self.schedule_guess_update()
         return "break"  # Prevents backspace from deleting a key when pressed
 
     def ctrl_a(self, event):
@@ -483,6 +536,7 @@ class EntryAutoFill(tk.Frame):
         :param event: Event given by self.entry.bind
         :return: None
         """
+        self.flush_guess_update()
         if len(self.current_guesses) > 0:
             new_guess = self.guess_selected - 1
             if new_guess < 0:
@@ -499,6 +553,7 @@ class EntryAutoFill(tk.Frame):
         :param event: Event given by self.entry.bind
         :return: None
         """
+        self.flush_guess_update()
         if len(self.current_guesses) > 0:
             new_guess = self.guess_selected + 1
             if new_guess > len(self.current_guesses) - 1 or new_guess >= self.max_guesses_shown:
@@ -511,6 +566,7 @@ class EntryAutoFill(tk.Frame):
         Has to exist so right arrow event doesn't go to self.key_pressed, so the icursor will move normally. Also
         makes guess fill if one is selected
         """
+        self.flush_guess_update()
         if self.guess_selected != -1:
             self.fill_with_guess()
             return 'break'
@@ -522,6 +578,8 @@ class EntryAutoFill(tk.Frame):
         Function to call the function given as callback for when ENTER is pressed while in the entry widget
         :return: True if function called, else False
         """
+        if self.fuzzy_index is not None:
+            self.fuzzy_index.record_use(self.entry.get().lower())   # So it's ranked first next time it's mistyped
         if self.callback_function is not None:
             self.callback_function()
             return True
@@ -548,4 +606,7 @@ class EntryAutoFill(tk.Frame):
         :return: None
         """
         self.real_root.focus()
+        if self.pending_guess_update is not None:
+            self.after_cancel(self.pending_guess_update)
+            self.pending_guess_update = None
         self.hide_guess_window()
@@ -0,0 +1,32 @@
+FORM_SEPARATOR = "**"
+
+
+def split_form(pokemon):
+    """
+    Splits a "**" type changed form into its base pokemon and its types
+    :param pokemon: Name like "arceus**fire", "silvally**dark", or a plain name like "garchomp"
+    :return: Tuple (base pokemon name, tuple of type names), the types are empty for plain names
+    """
+    name, *form_types = pokemon.split(FORM_SEPARATOR)
+    return name, tuple(form_types)
+
+
+def apply_form(base, type_names):
+    """
+    Gets the record shown for a type changed form (Arceus, Silvally, and Genesect), without fetching or changing
+    anything. The form's types replace the base's types in the same positions and the rest are kept, so
+    "genesect**fire" is Fire/Steel. The base record is read only, so it can be cached and shared by every form made
+    from it
+    :param base: SpeciesRecord of the base pokemon
+    :param type_names: Types from split_form
+    :return: base itself if there are no form types, else a new SpeciesRecord sharing base's stats
+    """
+    if not type_names:
+        return base
+    types = list(base.type_names)
+    for i, type_name in enumerate(type_names):
+        if i < len(types):
+            types[i] = type_name
+        else:
+            types.append(type_name)
+    return base.with_types(types)
@@ -0,0 +1,122 @@
+import itertools
+import re
+from collections import Counter
+
+
+def normalize(text):
+    """
+    Turns an entry or query into the form compared by FuzzyIndex, lowercase with only letters and numbers, so
+    "Tapu Koko" and "tapu-koko" are the same
+    :param text: String to normalize
+    :return: Normalized string
+    """
+    return re.sub(r"[^a-z0-9]", "", text.lower())
+
+
+def grams(key, size=3):
+    """
+    Gets the n-grams of a normalized key, padded at the front so the start of a key counts for more
+    :param key: Normalized string
+    :param size: Length of each gram
+    :return: Set of grams
+    """
+    padded = "^" * (size - 1) + key
+    return {padded[i:i + size] for i in range(len(padded) - size + 1)}
+
+
+def prefix_distance(query, key, max_distance):
+    """
+    Gets the edit distance from query to the closest prefix of key, so a query that's a misspelled start of key is
+    close to it. Stops early once the distance is over max_distance
+    :param query: Normalized query
+    :param key: Normalized entry
+    :param max_distance: Largest distance that matters
+    :return: Int distance, max_distance + 1 if it's further than max_distance
+    """
+    previous = list(range(len(key) + 1))
+    for i, query_char in enumerate(query, 1):
+        current = [i]
+        for j, key_char in enumerate(key, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (query_char != key_char)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return min(min(previous), max_distance + 1)
+
+
+class FuzzyIndex:
+    """
+    Typo tolerant search over autocomplete entries. An inverted index of n-grams finds entries sharing enough of the
+    query's grams, which are then ranked by prefix match, then edit distance, then how recently they were used
+    -----
+    entries: list
+        - Entries to search, in the form they should be returned
+    max_candidates: int
+        - Most entries checked with edit distance per search, the ones sharing the most grams are checked
+    """
+
+    def __init__(self, entries, max_candidates=64):
+        self.entries = list(entries)
+        self.keys = [normalize(x) for x in self.entries]
+        self.max_candidates = max_candidates
+        self.postings = {}  # gram -> list of entry numbers with that gram
+        for number, key in enumerate(self.keys):
+            for gram in grams(key):
+                self.postings.setdefault(gram, []).append(number)
+
+        self.use_clock = itertools.count(1)
+        self.last_used = {}     # entry number -> tick of its last use, higher is more recent
+        self.entry_numbers = {entry: number for number, entry in enumerate(self.entries)}
+
+    @staticmethod
+    def max_distance_for(query):
+        """
+        Gets how many typos are allowed for a query, more for longer queries
+        :param query: Normalized query
+        :return: Int
+        """
+        return 1 if len(query) <= 4 else 2 if len(query) <= 8 else 3
+
+    def record_use(self, entry):
+        """
+        Marks an entry as just used, so it ranks above others that are equally close
+        :param entry: Entry that was used
+        :return: None
+        """
+        if entry in self.entry_numbers:
+            self.last_used[self.entry_numbers[entry]] = next(self.use_clock)
+
+    def search(self, query, limit=4):
+        """
+        Finds the entries closest to a possibly misspelled query
+        :param query: What was typed
+        :param limit: Max number of entries to return
+        :return: List of entries, best first
+        """
+        key = normalize(query)
+        if len(key) < 2:
+            return []
+        max_distance = self.max_distance_for(key)
+
+        # Each typo changes at most 3 grams, so entries sharing fewer than that are too far off to check
+        query_grams = grams(key)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self.postings.get(gram, ()))
+        needed = max(1, len(query_grams) - 3 * max_distance)
+
+        ranked = []
+        for number, count in shared.most_common(self.max_candidates):
+            if count < needed:
+                break
+            candidate = self.keys[number]
+            if candidate.startswith(key):
+                distance = 0
+            else:
+                distance = prefix_distance(key, candidate, max_distance)
+                if distance > max_distance:
+                    continue
+            ranked.append((not candidate.startswith(key), distance, -self.last_used.get(number, 0), number))
+
+        ranked.sort()
+        return [self.entries[x[3]] for x in ranked[:limit]]
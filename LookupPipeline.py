@@ -0,0 +1,266 @@
+import itertools
+import queue
+import threading
+import time
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from FormOverlay import split_form, apply_form
+from SpeciesRecord import SpeciesRecord
+
+# Everything a PokemonDisplay needs to show a pokemon, made off the Tk thread. error is set instead of the rest if
+# the lookup failed
+LookupResult = namedtuple("LookupResult", "pokemon name pokemon_data matchups sprite_image error")
+
+
+class SupersededError(Exception):
+    """
+    Raised inside a lookup that was replaced by a newer request for the same slot, so it stops early
+    """
+    pass
+
+
+class LookupPipeline:
+    """
+    Runs pokemon lookups on background threads and hands finished ones back to the Tk thread through root.after.
+    Requests are made per slot (a display), and a newer request for a slot supersedes the older one, so only the
+    latest result for a slot is ever shown
+    -----
+    root: tk.Tk()
+        - Root of the window, results are handled on its thread
+    poke_client: pokepy.V2Client or LocalPokeClient
+        - Where species data comes from
+    sprite_cache: SpriteCache
+        - Where sprites come from
+    max_workers: int
+        - Max number of lookups running at once
+    poll_interval: int
+        - Milliseconds between checks for finished lookups, only checked while a lookup is pending
+    max_species_cached: int
+        - Most pokemon kept in memory, the least recently used are dropped first. Records are small, so the default
+          holds every species
+    sprite_timeout: float
+        - Seconds a lookup waits for its sprite before showing the pokemon with the no picture sprite
+    """
+
+    def __init__(self, root, poke_client, sprite_cache, max_workers=4, poll_interval=20, max_species_cached=2048,
+                 sprite_timeout=10):
+        self.root = root
+        self.poke_client = poke_client
+        self.sprite_cache = sprite_cache
+        self.poll_interval = poll_interval
+        self.sprite_timeout = sprite_timeout
+
+        # SpeciesRecords by name, read only so forms can share them
+        self.species_cache = OrderedDict()
+        self.species_cache_lock = threading.Lock()
+        self.max_species_cached = max_species_cached
+        self.matchup_cache = {}     # tuple of type names -> matchups dict, read only, at most 19 * 19 entries
+
+        # Counters, can be checked with self.stats()
+        self.species_hits = 0
+        self.species_misses = 0
+        self.prefetches = 0
+        self.last_warm_time = 0.0
+        self.max_warm_time = 0.0
+        self.prefetch_lock = threading.Lock()
+
+        # Sprites are downloaded on their own executor so a lookup waiting on its sprite never blocks a lookup thread
+        self.lookup_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lookup")
+        self.sprite_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sprite")
+
+        self.generations = itertools.count(1)
+        self.latest = {}        # slot -> generation of the newest request for it
+        self.pending = {}       # slot -> (generation, future, callback) of the newest request
+        self.results = queue.Queue()    # (slot, generation, LookupResult) from the lookup threads
+        self.draining = False   # Whether self.drain is scheduled, it stops once nothing is pending
+
+    def request(self, slot, pokemon, callback):
+        """
+        Starts looking up a pokemon in the background, superseding any lookup still running for the slot
+        :param slot: Hashable key for who the lookup is for, like a display number
+        :param pokemon: Name of the pokemon, can be a "**" type changed form
+        :param callback: Function called on the Tk thread with the LookupResult, only if it's still the newest
+        :return: None
+        """
+        generation = next(self.generations)
+        self.latest[slot] = generation
+
+        if slot in self.pending:
+            self.pending[slot][1].cancel()     # Only stops it if it hasn't started, otherwise it's dropped when done
+
+        future = self.lookup_executor.submit(self.run_lookup, slot, generation, pokemon)
+        self.pending[slot] = (generation, future, callback)
+        if not self.draining:
+            self.draining = True
+            self.root.after(self.poll_interval, self.drain)
+
+    def is_current(self, slot, generation):
+        """
+        Checks if a lookup is still the newest one for its slot
+        :return: Boolean
+        """
+        return self.latest.get(slot) == generation
+
+    def run_lookup(self, slot, generation, pokemon):
+        """
+        Runs on a lookup thread, does the lookup and queues the result for self.drain
+        :return: None
+        """
+        try:
+            result = self.fetch(pokemon, lambda: self.is_current(slot, generation))
+        except SupersededError:
+            return
+        except Exception as error:
+            result = LookupResult(pokemon, None, None, None, None, error)
+        self.results.put((slot, generation, result))
+
+    def get_species(self, name):
+        """
+        Gets a pokemon from poke_client, or from memory if it was fetched before. Only the compact record of it is
+        kept, not the full resource
+        :param name: Name of the pokemon, not a "**" form
+        :return: SpeciesRecord
+        """
+        with self.species_cache_lock:
+            if name in self.species_cache:
+                self.species_cache.move_to_end(name)
+                self.species_hits += 1
+                return self.species_cache[name]
+            self.species_misses += 1
+
+        # Fetched without the lock so lookups run at once
+        pokemon_data = SpeciesRecord.from_resource(self.poke_client.get_pokemon(name))
+
+        with self.species_cache_lock:
+            self.species_cache[name] = pokemon_data
+            self.species_cache.move_to_end(name)
+            while len(self.species_cache) > self.max_species_cached:
+                self.species_cache.popitem(last=False)
+        return pokemon_data
+
+    def get_matchups(self, type_names):
+        """
+        Gets the type matchups of a pair of types, worked out once per pair
+        :param type_names: Tuple of one or two type names
+        :return: Dict from TypeChart.type_matchups, shared so it must not be changed
+        """
+        matchups = self.matchup_cache.get(type_names)
+        if matchups is None:
+            from TypeChart import type_matchups     # Loads NumPy on the first lookup's thread, not while starting up
+            matchups = self.matchup_cache[type_names] = type_matchups(type_names)
+        return matchups
+
+    def prefetch(self, pokemon_list, started=None, callback=None):
+        """
+        Warms the species, sprites, and matchups of pokemon that are likely to be shown soon, like a team from Team
+        Preview, so looking them up later only hits caches. Pokemon are warmed at once on the lookup threads
+        :param pokemon_list: Names of the pokemon, can be "**" type changed forms
+        :param started: time.perf_counter() the pokemon were known at, defaults to now
+        :param callback: Function called with the seconds from started until every pokemon was warmed, on whichever
+                         thread finished last
+        :return: None
+        """
+        pokemon_list = list(dict.fromkeys(pokemon_list))
+        if not pokemon_list:
+            return
+        started = time.perf_counter() if started is None else started
+        remaining = [len(pokemon_list)]
+
+        def warmed(__):
+            with self.prefetch_lock:
+                remaining[0] -= 1
+                if remaining[0] > 0:
+                    return
+                elapsed = time.perf_counter() - started
+                self.prefetches += 1
+                self.last_warm_time = elapsed
+                self.max_warm_time = max(self.max_warm_time, elapsed)
+            if callback is not None:
+                callback(elapsed)
+
+        for pokemon in pokemon_list:
+            self.lookup_executor.submit(self.warm, pokemon).add_done_callback(warmed)
+
+    def warm(self, pokemon):
+        """
+        Runs on a lookup thread, fills the caches for one pokemon. Failures are left for the real lookup to show
+        :param pokemon: Name of the pokemon, can be a "**" type changed form
+        :return: None
+        """
+        try:
+            name, form_types = split_form(pokemon)
+            pokemon_data = apply_form(self.get_species(name), form_types)
+            sprite_future = self.sprite_executor.submit(self.sprite_cache.get_image, pokemon_data.sprite_url)
+            self.get_matchups(pokemon_data.type_names)
+            sprite_future.result(self.sprite_timeout)
+        except Exception:
+            pass
+
+    def fetch(self, pokemon, is_current=lambda: True):
+        """
+        Gets everything needed to show a pokemon. The sprite download runs alongside the type matchups, type data
+        itself needs no fetch as it comes from the precomputed chart
+        :param pokemon: Name of the pokemon, can be a "**" type changed form (for Arceus, Silvally, and Genesect)
+        :param is_current: Function that returns False once this lookup is superseded
+        :return: LookupResult
+        """
+        # Type changed forms are a read only view over the base pokemon, so switching forms fetches nothing new
+        name, form_types = split_form(pokemon)
+        pokemon_data = apply_form(self.get_species(name), form_types)
+
+        if not is_current():
+            raise SupersededError
+
+        sprite_future = self.sprite_executor.submit(self.sprite_cache.get_image, pokemon_data.sprite_url)
+        matchups = self.get_matchups(pokemon_data.type_names)
+        try:
+            sprite_image = sprite_future.result(self.sprite_timeout)
+        except FutureTimeoutError:
+            sprite_image = None     # Still downloading, it's cached for next time once it finishes
+        except Exception:
+            sprite_image = None     # A sprite that can't be downloaded is shown the same as a missing sprite
+
+        return LookupResult(pokemon, name, pokemon_data, matchups, sprite_image, None)
+
+    def drain(self):
+        """
+        Runs on the Tk thread, hands finished lookups that are still the newest for their slot to their callbacks.
+        Runs again every self.poll_interval ms until no lookups are pending
+        :return: None
+        """
+        try:
+            while True:
+                try:
+                    slot, generation, result = self.results.get_nowait()
+                except queue.Empty:
+                    break
+                if self.is_current(slot, generation):
+                    callback = self.pending.pop(slot)[2]
+                    callback(result)
+        finally:    # Keeps draining even if a callback raised
+            if self.pending:
+                self.root.after(self.poll_interval, self.drain)
+            else:
+                self.draining = False
+
+    def stats(self):
+        """
+        Gets the cache and prefetch counters
+        :return: Dict of species cache hits and misses, prefetches done, and the last and worst seconds from a team
+                 being known until it was warmed
+        """
+        return {
+            "species_hits": self.species_hits,
+            "species_misses": self.species_misses,
+            "prefetches": self.prefetches,
+            "last_warm_time": self.last_warm_time,
+            "max_warm_time": self.max_warm_time,
+        }
+
+    def shutdown(self):
+        """
+        Stops the lookup threads, lookups that haven't started are dropped
+        :return: None
+        """
+        self.lookup_executor.shutdown(wait=False)
+        self.sprite_executor.shutdown(wait=False)
@@ -0,0 +1,179 @@
+import json
+import os
+import sys
+from FormOverlay import split_form
+from PokemonNameRelations import name_relations, cosmetic_species, cosmetic_formes
+from ShowdownProtocol import to_id
+from PokemonTypes import TYPE_INDEX
+
+DEFAULT_INDEX_PATH = "name_index.json"
+
+# IDs of the pokemon whose unknown formes fall back to the base pokemon, see PokemonNameRelations
+COSMETIC_SPECIES = frozenset(to_id(x) for x in cosmetic_species)
+COSMETIC_FORMES = frozenset(to_id(x) for x in cosmetic_formes)
+
+
+def guess_data_key(name):
+    """
+    Guesses the data key of a display name the way PokeAPI names pokemon, used for names without an alias
+    :param name: Name like "Tapu Koko" or "Mr. Mime"
+    :return: Key like "tapu-koko" or "mr-mime"
+    """
+    name = name.lower().replace("'", "").replace("\u2019", "").replace(".", " ").replace(":", " ")
+    return "-".join(name.split())
+
+
+def target_exists(poke_client, key, checked):
+    """
+    Checks that a data key can be looked up, "**" type changed forms need their base pokemon and real types
+    :param poke_client: Data source, LocalPokeClient or pokepy.V2Client
+    :param key: Data key like "tapu-koko" or "arceus**fire"
+    :param checked: Dict of pokemon name -> result, shared between calls so each is only checked once
+    :return: Boolean
+    """
+    name, form_types = split_form(key)
+    if any(x not in TYPE_INDEX for x in form_types):
+        return False
+    if name not in checked:
+        if hasattr(poke_client, "has_pokemon"):
+            checked[name] = poke_client.has_pokemon(name)
+        else:
+            try:
+                poke_client.get_pokemon(name)
+                checked[name] = True
+            except Exception:
+                checked[name] = False
+    return checked[name]
+
+
+class NameIndex:
+    """
+    Maps any way a pokemon is written (Showdown species and forme names, display names, nicknames of forms) to the key
+    the data source knows it by. Names are folded with ShowdownProtocol.to_id, so each lookup is one dict lookup
+    -----
+    aliases: dict
+        - ID -> data key
+    validated: boolean
+        - Whether every key in aliases was checked against the data source. Unvalidated indexes guess a key for
+          names they don't know, validated ones return None so bad names never reach the data source
+    """
+
+    def __init__(self, aliases, validated=False):
+        self.aliases = aliases
+        self.validated = validated
+
+    def resolve(self, name):
+        """
+        Gets the data key for a name. In a validated index, cosmetic formes it doesn't know ("Gastrodon-East") fall
+        back to their base pokemon, any other unknown forme could have other types or stats so it isn't resolved
+        :param name: Name like "Tapu Koko", "tapu-koko", or "Arceus-Fire"
+        :return: Data key like "tapu-koko" or "arceus**fire", None if the name isn't known by a validated index
+        """
+        key = self.aliases.get(to_id(name))
+        if key is not None:
+            return key
+        if not self.validated:
+            return guess_data_key(name)
+
+        name_id = to_id(name)
+        parts = name.split("-")
+        for count in range(len(parts) - 1, 0, -1):
+            base_id = to_id("-".join(parts[:count]))
+            if base_id in COSMETIC_SPECIES or name_id in COSMETIC_FORMES:
+                return self.aliases.get(base_id)
+        return None
+
+    def __contains__(self, name):
+        return to_id(name) in self.aliases
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        """
+        Writes the index to a json file
+        :param path: Where to write it
+        :return: None
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"validated": self.validated, "aliases": self.aliases}, file, sort_keys=True)
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        """
+        Reads an index written by save
+        :param path: Path to the json file
+        :return: NameIndex
+        """
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        return cls(data["aliases"], data["validated"])
+
+
+def build_name_index(pokemon_names, poke_client=None, relations=name_relations):
+    """
+    Compiles the name index from every known name. Aliases pointing at keys the data source doesn't have are left out
+    and reported
+    :param pokemon_names: Display names like the ones in pokemon.json
+    :param poke_client: Data source to check every key against, also adds every name it has if it can list them.
+                        None builds an unvalidated index
+    :param relations: Dict of special names -> data key, like PokemonNameRelations.name_relations
+    :return: Tuple (NameIndex, list of (alias, key) pairs left out)
+    """
+    # ID -> (alias, key). Names from the data source come first, display names are only guessed for IDs not already
+    # known, and relations always win
+    candidates = {}
+    if poke_client is not None and hasattr(poke_client, "pokemon_names"):
+        for key in poke_client.pokemon_names():
+            candidates[to_id(key)] = (key, key)
+    for name in pokemon_names:
+        candidates.setdefault(to_id(name), (name, guess_data_key(name)))
+    for alias, key in relations.items():
+        candidates[to_id(alias)] = (alias, key)
+        candidates.setdefault(to_id(key.replace("**", "-")), (key, key))
+
+    if poke_client is None:
+        return NameIndex({name_id: key for name_id, (__, key) in candidates.items()}), []
+
+    aliases = {}
+    problems = []
+    checked = {}
+    for name_id, (alias, key) in candidates.items():
+        if target_exists(poke_client, key, checked):
+            aliases[name_id] = key
+        else:
+            problems.append((alias, key))
+    return NameIndex(aliases, validated=True), problems
+
+
+def load_name_index(pokemon_names, poke_client=None, path=DEFAULT_INDEX_PATH):
+    """
+    Loads the index built by running this file, or compiles one if it hasn't been built. A compiled one is only
+    validated if poke_client can list its pokemon (the local data store), as checking each name over the network is
+    too slow for startup
+    :param pokemon_names: Display names like the ones in pokemon.json
+    :param poke_client: Data source in use
+    :param path: Path of the built index
+    :return: NameIndex
+    """
+    if os.path.isfile(path):
+        return NameIndex.load(path)
+    return build_name_index(pokemon_names, poke_client if hasattr(poke_client, "pokemon_names") else None)[0]
+
+
+if __name__ == "__main__":
+    # Usage: python NameIndex.py [data store path]
+    # Builds name_index.json, checking every name against the local data store (or PokeAPI if there's no store)
+    from PokeDataStore import LocalPokeClient, DEFAULT_STORE_PATH
+    store_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_STORE_PATH
+    if os.path.isfile(store_path):
+        client = LocalPokeClient(store_path)
+    else:
+        import pokepy
+        client = pokepy.V2Client()
+
+    with open("pokemon.json", "r") as pokemon_file:
+        names = json.load(pokemon_file)
+    index, left_out = build_name_index(names, client)
+    index.save()
+    print("Wrote {} names to {}".format(len(index.aliases), DEFAULT_INDEX_PATH))
+    for problem_alias, problem_key in left_out:
+        print("Left out {} -> {}, not in the data source".format(problem_alias, problem_key))
+    sys.exit(1 if left_out else 0)
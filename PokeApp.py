@@ -1,21 +1,55 @@
+import StartupReport     # Imported first so it can time every other import when ran with --startup-report
 import tkinter as tk
-import pokepy
+import os
 import sys
 from PokemonDisplay import PokemonDisplay
-from ShowdownListener import ShowdownListener
 import json
 from EntryAutoFill import EntryAutoFill
-from PokemonNameRelations import name_relations
+from NameIndex import load_name_index
+import Popup
+from PokeDataStore import LocalPokeClient, DEFAULT_STORE_PATH
+from SpriteCache import SpriteCache
+from TypeIcons import TypeIconAtlas
+from LookupPipeline import LookupPipeline
+from SwitchEvents import SwitchEventQueue, SINGLES_SLOTS
+from ThemeRegistry import ThemeRegistry
 
 
 class PokeApp:
-    def __init__(self, real_root):
+    def __init__(self, real_root, data_store=None, canvas_displays=False):
         self.root = real_root
         self.root.title("PokeShowdown Helper")
         self.root.resizable(width=False, height=False)
         self.root.protocol("WM_DELETE_WINDOW", lambda: self.on_exit())
 
-        self.poke_client = pokepy.V2Client()
+        # Uses the offline data store (made with PokeDataStore.py) when one is given and exists, otherwise PokeAPI
+        if data_store is not None and os.path.isfile(data_store):
+            self.poke_client = LocalPokeClient(data_store)
+        else:
+            import pokepy   # Only loaded when there's no data store, it pulls in a lot
+            self.poke_client = pokepy.V2Client()
+
+        self.sprite_cache = SpriteCache()   # Shared by all pokemon displays so sprites are only downloaded once
+        self.type_icons = TypeIconAtlas(self.root)  # Type icons are decoded once here and shared by all displays
+        # Runs lookups off the Tk thread so the window doesn't freeze while they're fetched
+        self.lookups = LookupPipeline(self.root, self.poke_client, self.sprite_cache)
+
+        # Switches found by the showdown thread. Publishing one wakes the Tk thread with a <<SwitchEvents>> event so
+        # it's drained right away, polling every self.switch_poll_interval ms is only a backstop in case the wake up
+        # couldn't be sent. The interval doubles while battles are idle, up to the max, and drops back to the min once
+        # something happens
+        self.switch_events = SwitchEventQueue(on_wake=self.wake_switch_events)
+        self.min_switch_poll_interval = 50
+        self.max_switch_poll_interval = 400
+        self.switch_poll_interval = self.min_switch_poll_interval
+        # Whether pokemon displays are drawn on one canvas (CanvasPokemonDisplay) instead of with widgets
+        self.canvas_displays = canvas_displays
+        # Follows Showdown battles, only started the first time pokemon showdown mode is used
+        self.showdown_thread = None
+        # Final stats of every species for the speed tiers, made the first time they're shown (see StatEngine.py)
+        self.stat_engine = None
+        self.battle_level = 100
+        self.speed_stages = {}  # slot -> speed boost stage of the pokemon in it, from the showdown thread
 
         # Sets up menu bar at the top of the window
         self.root.menubar = tk.Menu(self.root)
@@ -27,11 +61,12 @@ class PokeApp:
         self.root.mode_menu.add_command(label="Toggle Theme", command=lambda: self.switch_modes('toggle theme'))
         self.root.menubar.add_cascade(label='Options', menu=self.root.mode_menu)
 
-        self.dark_theme = True
+        # Widgets are registered here with the theme colors they take, so switching themes recolors all of them
+        self.theme = ThemeRegistry("dark")
 
-        self.current_bg_color = "#3C3F41"  # These are the default colors, same values are in switch_modes
-        self.current_fg_color = "#A9B7C6"  # under dark mode.
-        self.current_darker_bg_color = "#1a1b1c"
+        self.current_bg_color = self.theme.colors["bg"]     # Colors of the current theme, used for new widgets
+        self.current_fg_color = self.theme.colors["fg"]
+        self.current_darker_bg_color = self.theme.colors["dark_bg"]
 
         self.master = tk.Frame(self.root, bg=self.current_bg_color)
 
@@ -46,10 +81,8 @@ class PokeApp:
         self.pokemon_stats_shown = True  # Used to show / hide the pokemon stats for all pokemon displays in the
         # self.toggle_pokemon_stats method
 
-        self.pokemon_display_status = {  # Used in creating / destroying pokemon displays and keeping track if they
-            1: False,  # exist or not
-            2: False
-        }
+        # Used in showing / hiding pokemon displays and keeping track if they're shown, (side, position) -> boolean
+        self.pokemon_display_status = {}
 
         self.top_bar_frame = tk.Frame(self.master, bg=self.current_bg_color)
         self.top_bar_frame.grid(column=0, row=1, columnspan=3)
@@ -57,6 +90,8 @@ class PokeApp:
         # Input box at the top
         with open("pokemon.json", "r") as file:     # Gets the list of pokemon from pokemon.json for the auto-filling
             self.pokemon_list = json.load(file)
+        # Resolves typed and Showdown names to the names the data source uses, built with NameIndex.py
+        self.name_index = load_name_index(self.pokemon_list, self.poke_client)
 
         self.url_input = EntryAutoFill(self.top_bar_frame, self.root, self.pokemon_list, real_width=100,
                                        entry_bg=self.current_fg_color, guess_bg=self.current_fg_color,
@@ -75,28 +110,27 @@ class PokeApp:
         self.loading_icon = None
         self.loading_icon_shown = False
 
-        # Groups used to change the theme
-        self.regular_bg_group = [self.master, self.top_bar_frame]
-        self.dark_bg_group = [self.url_button]
-        self.light_bg_group = [self.url_input]
-        self.regular_fg_group = []
+        self.battle_summary = None  # Table of every watched battle, only exists in pokemon showdown mode
+
+        self.theme.register(self.master, "bg")
+        self.theme.register(self.top_bar_frame, "bg")
+        self.theme.register(self.url_button, "dark_bg")
+        self.theme.register(self.url_input, "light_bg")
 
-        self.pokemon_display_parts = {  # Used to store the  pokemon displays
-            1: None,
-            2: None
-        }
+        # Used to store the pokemon displays, (side, position) -> display. Displays are made the first time their
+        # slot is shown and kept when hidden, so they're reused by the next battle that needs them
+        self.pokemon_display_parts = {}
 
-        self.create_pokemon_display(1)
+        self.create_pokemon_display(SINGLES_SLOTS[0])
 
-    @staticmethod
-    def on_exit():
+    def on_exit(self):
         """
-        Called when window is closed, used to make sure the showdown thread and selenium window close
+        Called when window is closed, used to make sure the lookup threads and showdown thread close
         :return: None
         """
-        global showdown_thread
-        showdown_thread.browser.quit()
-        showdown_thread.do_stop = True
+        self.lookups.shutdown()
+        if self.showdown_thread is not None:
+            self.showdown_thread.stop()
         sys.exit(0)
 
     def switch_modes(self, mode):
@@ -105,48 +139,78 @@ class PokeApp:
         :param mode: string Mode to do stuff for
         :return: None
         """
-        global showdown_thread
         if mode == 'toggle theme':
             # Switches themes between light and dark mode
-            if self.dark_theme:
-                bg = "white"
-                fg = "black"
-                dark_bg = "black"
-            else:
-                bg = "#3C3F41"  # These colors are the default ones that are in PokeApp class
-                fg = "#A9B7C6"
-                dark_bg = "#1a1b1c"
-
-            for widget in self.regular_bg_group:
-                widget.config(bg=bg)
-            for widget in self.dark_bg_group:
-                widget.config(bg=dark_bg)
-            for widget in self.light_bg_group:
-                widget.config(bg=fg)
-            for widget in self.regular_fg_group:
-                widget.config(fg=fg)
-
-            self.current_bg_color = bg
-            self.current_fg_color = fg
-            self.current_darker_bg_color = dark_bg
-
-            self.master.config(bg=bg)
-            self.root.config(bg=bg)
-            self.dark_theme = not self.dark_theme
+            self.theme.apply("light" if self.theme.theme == "dark" else "dark")
+            self.current_bg_color = self.theme.colors["bg"]
+            self.current_fg_color = self.theme.colors["fg"]
+            self.current_darker_bg_color = self.theme.colors["dark_bg"]
+            self.root.config(bg=self.current_bg_color)
 
         elif mode == "one pokemon":
             # Switches to manual lookup mode with one pokemon
             self.url_input.empty()
             self.showdown_mode = False
-            showdown_thread.url = ""
+            if self.showdown_thread is not None:
+                self.showdown_thread.watch("")
             self.url_input.turn_on_guess_window()
-            self.delete_pokemon_display(2)
+            self.show_display_slots(SINGLES_SLOTS[:1])
+            if self.battle_summary is not None:
+                self.battle_summary.destroy()
+                self.battle_summary = None
 
         elif mode == "two pokemon":
             # Switches to pokemon showdown mode where pokemon are updated from given URL
             self.showdown_mode = True
+            self.start_showdown_thread()
             self.url_input.turn_off_guess_window()
-            self.create_pokemon_display(2)
+            self.show_display_slots(SINGLES_SLOTS)
+            if self.battle_summary is None:
+                from BattleSummary import BattleSummary
+                # Every battle link entered is watched, the newest is shown in the displays and the rest are listed
+                # here. Double clicking a battle shows it in the displays, Delete stops watching it
+                self.battle_summary = BattleSummary(self.master, on_focus=self.showdown_thread.focus,
+                                                    on_remove=self.showdown_thread.remove, bg=self.current_bg_color)
+                self.battle_summary.grid(column=1, row=10, columnspan=3)
+                self.theme.register(self.battle_summary, "bg")
+
+    def start_showdown_thread(self):
+        """
+        Starts the thread that follows Showdown battles if it isn't running yet. Its imports and connection are put
+        off until now, as most sessions only use manual lookup mode
+        :return: None
+        """
+        if self.showdown_thread is None:
+            from ShowdownListener import ShowdownListener
+            self.showdown_thread = ShowdownListener(self)
+            self.root.bind("<<SwitchEvents>>", lambda event: self.drain_switch_events())
+            self.showdown_thread.start()
+            self.root.after(self.switch_poll_interval, self.poll_switch_events)
+
+    def wake_switch_events(self):
+        """
+        Asks the Tk thread to drain the switch events, called from the showdown thread when it publishes
+        :return: None
+        """
+        try:
+            self.root.event_generate("<<SwitchEvents>>", when="tail")
+        except (RuntimeError, tk.TclError):
+            pass    # The Tk thread isn't in its main loop (starting up or closing), the next poll drains instead
+
+    def poll_switch_events(self):
+        """
+        Drains the switch events every self.switch_poll_interval ms, in case a wake up was missed
+        :return: None
+        """
+        busy = True     # Keeps polling quickly if draining raised
+        try:
+            busy = self.drain_switch_events()
+        finally:
+            if busy:
+                self.switch_poll_interval = self.min_switch_poll_interval
+            else:
+                self.switch_poll_interval = min(self.switch_poll_interval * 2, self.max_switch_poll_interval)
+            self.root.after(self.switch_poll_interval, self.poll_switch_events)
 
     def show_loading_icon(self):
         """
@@ -175,69 +239,164 @@ class PokeApp:
         Updates the url or changes the pokemon shown, depends on what mode is set in self.showdown_mode
         :return: None
         """
-        global showdown_thread
         self.show_loading_icon()
         if self.showdown_mode:
             url = self.url_input.get()
-            showdown_thread.url = url
-            showdown_thread.update_url = True
+            self.showdown_thread.watch(url)
+            self.hide_loading_icon()
         else:
-            mon = self.url_input.get()
-            # Checks if pokemon manually entered is a special one (in PokemonNameRelations.py) if so uses that
-            self.pokemon_display_parts[1].change_pokemon(name_relations[mon] if mon in name_relations else mon)
-        self.hide_loading_icon()
+            mon = self.name_index.resolve(self.url_input.get())
+            if mon is None:     # Not a name the data source has, so there's nothing to look up
+                self.hide_loading_icon()
+                self.show_unsupported_popup()
+                return
+            # The lookup runs in the background, the loading text is hidden once the newest one is shown
+            self.pokemon_display_parts[SINGLES_SLOTS[0]].request_pokemon(mon, callback=self.hide_loading_icon)
+
+    def show_unsupported_popup(self):
+        """
+        Tells the user the pokemon they asked for can't be looked up
+        :return: None
+        """
+        Popup.create_popup(self.root, "That pokemon is not supported", bg=self.current_fg_color,
+                           window_border_thickness=1, label_bg=self.current_fg_color, label_fg="black",
+                           button_bg=self.current_bg_color, button_fg="white",
+                           button_active_bg=self.current_fg_color, button_active_fg="black")
 
-    def create_pokemon_display(self, number, base_pokemon="darkrai"):
+    def drain_switch_events(self):
+        """
+        Takes the switches published by the showdown thread and starts looking up the pokemon for their displays,
+        shows the HP, status, and boosts of the active pokemon, and updates the rows of watched battles that changed.
+        Every display's lookup is started in the same pass, so they're fetched in parallel on the lookup threads. Ran
+        when the showdown thread wakes the Tk thread, and by self.poll_switch_events
+        :return: True if there was anything to drain, else False
+        """
+        self.switch_events.clear_wake()
+        busy = False
+        layout = self.switch_events.take_layout()
+        if layout is not None and self.showdown_mode:     # Manual lookup mode only ever has one display
+            busy = True
+            self.show_display_slots(layout)
+        events = self.switch_events.take_all()
+        busy = busy or len(events) > 0
+        for event in events:
+            display = self.pokemon_display_parts.get(event.slot)
+            # Compared to the pokemon last asked for, as the one shown can be behind while a lookup runs
+            if display is not None and display.requested_pokemon != event.pokemon:
+                display.request_pokemon(event.pokemon,
+                                        callback=lambda x=event: self.switch_events.record_render(x))
+        statuses = self.switch_events.take_statuses()
+        busy = busy or len(statuses) > 0
+        for slot, (status, speed_stage) in statuses.items():
+            display = self.pokemon_display_parts.get(slot)
+            if display is not None:
+                display.show_battle_status(status)
+                self.speed_stages[slot] = speed_stage
+        if statuses:
+            self.update_speed_tiers()
+        if self.battle_summary is not None:
+            updates = self.showdown_thread.take_room_updates()
+            busy = busy or len(updates) > 0
+            self.battle_summary.update_rows(updates)
+        return busy
+
+    def create_pokemon_display(self, slot, base_pokemon="darkrai", canvas=None):
         """
-        Creates the pokemon display
-        :param number: Number frame to do, number 1-2
+        Shows the pokemon display for a slot, making it the first time the slot is shown. Each side gets a row and
+        each of its positions a column, so singles is one display per row and doubles two
+        :param slot: (side, position) of the display, like ("p1", "a")
         :param base_pokemon: Pokemon to originally display
+        :param canvas: Whether to draw the display on one canvas, defaults to self.canvas_displays
         :return: None
         """
-        if not self.pokemon_display_status[number]:
-            self.pokemon_display_parts[number] = PokemonDisplay(self.master, self, self.poke_client, base_pokemon,
-                                                                number, bg=self.current_bg_color)
-            self.pokemon_display_parts[number].grid(column=1, row=1 + number, sticky='W')
-            self.regular_bg_group.append(self.pokemon_display_parts[number])
-            self.pokemon_display_status[number] = True
-        else:
-            pass
+        if self.pokemon_display_status.get(slot):
+            return
+        display = self.pokemon_display_parts.get(slot)
+        if display is None:
+            if canvas if canvas is not None else self.canvas_displays:
+                from CanvasPokemonDisplay import CanvasPokemonDisplay
+                display = CanvasPokemonDisplay(self.master, self, self.poke_client, base_pokemon, slot,
+                                               bg=self.current_bg_color)
+                self.theme.register(display, "bg", "fg")    # Its text is drawn on it, so it takes the fg color too
+            else:
+                display = PokemonDisplay(self.master, self, self.poke_client, base_pokemon, slot,
+                                         bg=self.current_bg_color)
+                self.theme.register(display, "bg")
+            if not self.pokemon_stats_shown:
+                display.remove_stat_display()
+            self.pokemon_display_parts[slot] = display
+        side, position = slot
+        display.grid(column=1 + ord(position) - ord("a"), row=1 + int(side[1:]), sticky='W')
+        self.pokemon_display_status[slot] = True
+
+    def delete_pokemon_display(self, slot):
+        """
+        Hides the pokemon display for a slot, it's kept to be shown again
+        :param slot: (side, position) of the display
+        :return: None
+        """
+        if self.pokemon_display_status.get(slot):
+            self.pokemon_display_parts[slot].grid_remove()
+            self.pokemon_display_parts[slot].show_battle_status("")
+            self.pokemon_display_status[slot] = False
+            self.speed_stages.pop(slot, None)
 
-    def delete_pokemon_display(self, number):
+    def show_display_slots(self, slots):
         """
-        Deletes the pokemon display
-        :param number: Number frame to do, number 1-2
+        Shows the pokemon displays for some slots and hides every other one
+        :param slots: Iterable of (side, position) slots
         :return: None
         """
-        if self.pokemon_display_status[number]:
-            self.pokemon_display_parts[number].destroy()
-            self.pokemon_display_parts[number] = None
-            self.pokemon_display_status[number] = False
-        else:
-            pass
+        slots = set(slots)
+        for slot, shown in list(self.pokemon_display_status.items()):
+            if shown and slot not in slots:
+                self.delete_pokemon_display(slot)
+        for slot in sorted(slots):
+            self.create_pokemon_display(slot)
+
+    def update_speed_tiers(self):
+        """
+        Shows the speed range of every shown pokemon and, in pokemon showdown mode, whether it outspeeds each pokemon
+        shown for the other sides. Called whenever a display shows a new pokemon or a speed boost changes
+        :return: None
+        """
+        shown = {slot: display for slot, display in self.pokemon_display_parts.items()
+                 if self.pokemon_display_status.get(slot) and display.pokemon_data is not None}
+        if not shown:
+            return
+        from StatEngine import StatEngine
+        records = [display.pokemon_data for display in shown.values()]
+        if self.stat_engine is None and hasattr(self.poke_client, "all_base_stats"):
+            self.stat_engine = StatEngine.from_store(self.poke_client, self.battle_level)
+        engine = self.stat_engine
+        if engine is None or any(x.name not in engine for x in records):
+            engine = StatEngine.from_records(records, self.battle_level)   # Only the shown pokemon, like with PokeAPI
+
+        for slot, display in shown.items():
+            opponents = []
+            if self.showdown_mode:
+                opponents = [(other.pokemon_data.name, self.speed_stages.get(other_slot, 0))
+                             for other_slot, other in shown.items() if other_slot[0] != slot[0]]
+            display.show_speed_tier(engine.describe_speed(display.pokemon_data.name, opponents,
+                                                          self.speed_stages.get(slot, 0)))
 
     def toggle_pokemon_stats(self):
         """
-        Turns on or off the pokemon stat displays for all PokemonDisplays
+        Turns on or off the pokemon stat displays for all PokemonDisplays, hidden ones included
         :return: None
         """
-        for number in self.pokemon_display_parts:
-            try:
-                if self.pokemon_stats_shown:
-                    self.pokemon_display_parts[number].remove_stat_display()
-                else:
-                    self.pokemon_display_parts[number].remember_stat_display()
-            except AttributeError:
-                pass  # Happens if the pokemon display doesn't exist, but is still None type in
-                # self.pokemon_display_parts[number]
+        for display in self.pokemon_display_parts.values():
+            if self.pokemon_stats_shown:
+                display.remove_stat_display()
+            else:
+                display.remember_stat_display()
 
         self.pokemon_stats_shown = not self.pokemon_stats_shown
 
 
 if __name__ == "__main__":
     root = tk.Tk()
-    gui = PokeApp(root)
-    showdown_thread = ShowdownListener(gui)
-    showdown_thread.start()
+    gui = PokeApp(root, data_store=DEFAULT_STORE_PATH, canvas_displays="--canvas-displays" in sys.argv)
     root.iconbitmap("icon.ico")     # Sets icon here so window only loads when everything is ready
+    StartupReport.report_when_shown(root)
     root.mainloop()
@@ -0,0 +1,188 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+from types import SimpleNamespace
+from SpeciesRecord import SpeciesRecord, sprite_key
+from PokemonTypes import TYPE_INDEX
+
+DEFAULT_STORE_PATH = "pokeapi.db"
+
+
+class PokemonNotFoundError(LookupError):
+    """
+    Raised by LocalPokeClient when a pokemon or type isn't in the data store
+    """
+    pass
+
+
+def find_api_root(dump_dir):
+    """
+    Finds the folder that holds the pokemon/ and type/ folders of a PokeAPI api-data dump
+    :param dump_dir: Either the root of the api-data repo or its data/api/v2 folder
+    :return: String path to the api root
+    """
+    for candidate in (os.path.join(dump_dir, "data", "api", "v2"), dump_dir):
+        if os.path.isdir(os.path.join(candidate, "pokemon")) and os.path.isdir(os.path.join(candidate, "type")):
+            return candidate
+    raise FileNotFoundError("No PokeAPI dump found in {}".format(dump_dir))
+
+
+def read_resources(folder):
+    """
+    Yields every index.json resource under folder (folder/<id>/index.json)
+    :param folder: Resource folder of the dump, like .../v2/pokemon
+    :return: Generator of loaded json dicts
+    """
+    for entry in os.listdir(folder):
+        path = os.path.join(folder, entry, "index.json")
+        if os.path.isfile(path):
+            with open(path, "r", encoding="utf-8") as file:
+                yield json.load(file)
+
+
+def import_pokeapi_dump(dump_dir, store_path=DEFAULT_STORE_PATH):
+    """
+    Ingests a local PokeAPI dump into an indexed SQLite store that LocalPokeClient can read
+    :param dump_dir: Folder of the PokeAPI api-data dump
+    :param store_path: Where to write the store, replaced if it already exists
+    :return: Tuple (number of pokemon, number of types) imported
+    """
+    api_root = find_api_root(dump_dir)
+
+    pokemon_rows = []
+    for pokemon in read_resources(os.path.join(api_root, "pokemon")):
+        types = sorted(pokemon["types"], key=lambda x: x["slot"])
+        stats = {stat["stat"]["name"]: stat["base_stat"] for stat in pokemon["stats"]}
+        pokemon_rows.append((pokemon["name"], pokemon["id"], types[0]["type"]["name"],
+                             types[1]["type"]["name"] if len(types) > 1 else None,
+                             stats["hp"], stats["attack"], stats["defense"], stats["special-attack"],
+                             stats["special-defense"], stats["speed"], pokemon["sprites"]["front_default"]))
+
+    type_rows = []
+    for poke_type in read_resources(os.path.join(api_root, "type")):
+        relations = poke_type["damage_relations"]
+        type_rows.append((poke_type["name"],
+                          " ".join(x["name"] for x in relations["double_damage_from"]),
+                          " ".join(x["name"] for x in relations["half_damage_from"]),
+                          " ".join(x["name"] for x in relations["no_damage_from"])))
+
+    temp_path = store_path + ".tmp"     # Built to the side so a half-written store is never opened
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    connection = sqlite3.connect(temp_path)
+    with connection:
+        connection.execute("CREATE TABLE pokemon (name TEXT PRIMARY KEY, id INTEGER NOT NULL, type_one TEXT NOT NULL, "
+                           "type_two TEXT, hp INTEGER, attack INTEGER, defense INTEGER, special_attack INTEGER, "
+                           "special_defense INTEGER, speed INTEGER, sprite TEXT) WITHOUT ROWID")
+        connection.execute("CREATE INDEX pokemon_id ON pokemon (id)")
+        connection.execute("CREATE TABLE type (name TEXT PRIMARY KEY, double_damage_from TEXT, "
+                           "half_damage_from TEXT, no_damage_from TEXT) WITHOUT ROWID")
+        connection.executemany("INSERT INTO pokemon VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", pokemon_rows)
+        connection.executemany("INSERT INTO type VALUES (?, ?, ?, ?)", type_rows)
+    connection.execute("VACUUM")
+    connection.close()
+    os.replace(temp_path, store_path)
+    return len(pokemon_rows), len(type_rows)
+
+
+class LocalPokeClient:
+    """
+    Offline stand-in for pokepy.V2Client, reads from a store made by import_pokeapi_dump. Pokemon are returned as
+    SpeciesRecords, types as objects with the same attributes as pokepy's resources
+    -----
+    store_path: string
+        - Path to the SQLite store
+    """
+
+    def __init__(self, store_path=DEFAULT_STORE_PATH):
+        if not os.path.isfile(store_path):
+            raise FileNotFoundError("No data store at {}".format(store_path))
+        self.store_path = store_path
+        # Shared by the lookup threads, self.lock makes sure only one of them uses the connection at a time
+        self.connection = sqlite3.connect("file:{}?mode=ro".format(store_path), uri=True, check_same_thread=False)
+        self.lock = threading.Lock()
+
+    def get_pokemon(self, name):
+        """
+        Looks up a pokemon by name or id
+        :param name: String name (or int id) of the pokemon
+        :return: SpeciesRecord
+        """
+        with self.lock:
+            if isinstance(name, int) or str(name).isdigit():
+                row = self.connection.execute("SELECT * FROM pokemon WHERE id = ?", (int(name),)).fetchone()
+            else:
+                row = self.connection.execute("SELECT * FROM pokemon WHERE name = ?",
+                                              (str(name).lower(),)).fetchone()
+        if row is None:
+            raise PokemonNotFoundError("{} is not in the data store".format(name))
+
+        name, pokemon_id, type_one, type_two, sprite = row[0], row[1], row[2], row[3], row[10]
+        type_ids = (TYPE_INDEX[type_one],) if type_two is None else (TYPE_INDEX[type_one], TYPE_INDEX[type_two])
+        return SpeciesRecord(name, pokemon_id, type_ids, row[4:10], sprite_key(sprite))   # Stats are in STATS order
+
+    def has_pokemon(self, name):
+        """
+        Checks if a pokemon is in the data store
+        :param name: String name of the pokemon
+        :return: Boolean
+        """
+        with self.lock:
+            return self.connection.execute("SELECT 1 FROM pokemon WHERE name = ?",
+                                           (str(name).lower(),)).fetchone() is not None
+
+    def pokemon_names(self):
+        """
+        Gets the name of every pokemon in the data store
+        :return: List of strings
+        """
+        with self.lock:
+            return [row[0] for row in self.connection.execute("SELECT name FROM pokemon")]
+
+    def all_base_stats(self):
+        """
+        Gets the base stats of every pokemon in the data store at once, for StatEngine
+        :return: List of (name, tuple of base stats in the order of SpeciesRecord.STATS)
+        """
+        with self.lock:
+            return [(row[0], row[1:]) for row in self.connection.execute(
+                "SELECT name, hp, attack, defense, special_attack, special_defense, speed FROM pokemon")]
+
+    def get_type(self, name):
+        """
+        Looks up a type by name
+        :param name: String name of the type
+        :return: Type resource with .name and .damage_relations
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT * FROM type WHERE name = ?", (str(name).lower(),)).fetchone()
+        if row is None:
+            raise PokemonNotFoundError("{} is not in the data store".format(name))
+
+        def named_list(names):
+            return [SimpleNamespace(name=x) for x in names.split()]
+
+        return SimpleNamespace(
+            name=row[0],
+            damage_relations=SimpleNamespace(double_damage_from=named_list(row[1]),
+                                             half_damage_from=named_list(row[2]),
+                                             no_damage_from=named_list(row[3]))
+        )
+
+    def close(self):
+        """
+        Closes the connection to the data store
+        :return: None
+        """
+        self.connection.close()
+
+
+if __name__ == "__main__":
+    # Usage: python PokeDataStore.py <path to api-data dump> [store path]
+    if len(sys.argv) < 2:
+        print("Usage: python PokeDataStore.py <path to api-data dump> [store path]")
+        sys.exit(1)
+    counts = import_pokeapi_dump(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else DEFAULT_STORE_PATH)
+    print("Imported {} pokemon and {} types".format(*counts))
@@ -1,12 +1,70 @@
 import tkinter as tk
-from PIL import Image, ImageTk
-import requests
-from io import BytesIO
-import beckett
-import Popup
+import sys
+from PIL import ImageTk
+from PokeDataStore import PokemonNotFoundError
+from LookupPipeline import LookupResult
 
 
-class PokemonDisplay(tk.Frame):
+class LookupDisplay:
+    """
+    Looking up and showing pokemon, shared by PokemonDisplay and CanvasPokemonDisplay. Classes using it set
+    self.poke_app, self.frame_number, self.pokemon_data, and self.current_pokemon, and draw results in self.render.
+    self.requested_pokemon is the newest pokemon asked for, which is ahead of self.current_pokemon while its lookup runs
+    """
+
+    def change_pokemon(self, pokemon):
+        """
+        Looks up and shows a pokemon, blocking until it's done. request_pokemon should be used from the Tk thread
+        :param pokemon: Name of the pokemon, can be a "**" type changed form (for Arceus, Silvally, and Genesect)
+        :return: True if the pokemon was shown, else False
+        """
+        self.requested_pokemon = pokemon
+        try:
+            result = self.poke_app.lookups.fetch(pokemon)
+        except Exception as error:
+            result = LookupResult(pokemon, None, None, None, None, error)
+        return self.show_lookup(result)
+
+    def request_pokemon(self, pokemon, callback=None):
+        """
+        Looks up a pokemon in the background and shows it when done, replacing any lookup still running for this
+        display
+        :param pokemon: Name of the pokemon, can be a "**" type changed form (for Arceus, Silvally, and Genesect)
+        :param callback: Function called with no arguments after the pokemon is shown (or fails to be)
+        :return: None
+        """
+        def lookup_done(result):
+            self.show_lookup(result)
+            if callback is not None:
+                callback()
+
+        self.requested_pokemon = pokemon
+        self.poke_app.lookups.request(self.frame_number, pokemon, lookup_done)
+
+    def show_lookup(self, result):
+        """
+        Shows a finished lookup, has to be called from the Tk thread
+        :param result: LookupPipeline.LookupResult
+        :return: True if the pokemon was shown, else False
+        """
+        if result.error is not None:
+            not_found_errors = (PokemonNotFoundError,)
+            if "beckett" in sys.modules:    # Only loaded if pokepy is used instead of the local data store
+                not_found_errors += (sys.modules["beckett"].exceptions.InvalidStatusCodeError,)
+            if isinstance(result.error, not_found_errors):
+                # This happpens when an entry that is not in PokeAPI (or the local data store) goes through
+                self.poke_app.show_unsupported_popup()
+                return False
+            raise result.error
+
+        self.pokemon_data = result.pokemon_data
+        self.current_pokemon = result.name
+        self.render(result)
+        self.poke_app.update_speed_tiers()  # Its speed compared to the other side changed too
+        return True
+
+
+class PokemonDisplay(LookupDisplay, tk.Frame):
     def __init__(self, parent, app_class, poke_api_class, pokemon='charizard', number=1, **kw):
 
         self.poke_client = poke_api_class
@@ -19,17 +77,14 @@ class PokemonDisplay(tk.Frame):
         self.master = self
         self.current_pokemon = pokemon
 
-        try:
-            self.pokemon_data = self.poke_client.get_pokemon(pokemon)
-        finally:
-            pass
+        self.pokemon_data = None    # Filled in once the first lookup finishes
 
         # Setup the pokemon sprite display
         self.pokemon_sprite_frame = tk.Frame(self.master, bg=self.poke_app.current_bg_color)    # Frame that holds
                                                                                         # pokemon sprite, name, and type
         self.pokemon_sprite_frame.grid(column=1, row=1, sticky=tk.N)
 
-        self.pokemon_render = ImageTk.PhotoImage(Image.open('default.png'))
+        self.pokemon_render = self.poke_app.type_icons.default_sprite
         self.pokemon_sprite = tk.Label(self.pokemon_sprite_frame, image=self.pokemon_render,  # Label for pokemon sprite
                                        bg=self.poke_app.current_bg_color)
         self.pokemon_sprite.grid(column=1, row=1, columnspan=2)
@@ -50,16 +105,30 @@ class PokemonDisplay(tk.Frame):
                                          fg=self.poke_app.current_fg_color)
         self.weaknesses_title.grid(column=1, row=1)
         self.resistances_title.grid(column=2, row=1)
-        self.immunities_title.grid(column=3, row=1)     # This is also done when immunity types are drawn
+        self.immunities_title.grid(column=3, row=1)
+        for title in self.weaknesses_title, self.resistances_title, self.immunities_title:
+            title.grid_remove()     # Shown once their column has icons
 
-        # Sets up variables that are used to display various things
-        self.type_one_sprite = None
-        self.type_one_render = None     # Needs to be declared b/c Label widget needs a reference to the render always
-        self.type_two_sprite = None
-        self.type_two_render = None
-        self.resistance_labels = []
-        self.weakness_labels = []
-        self.immunity_labels = []
+        # Type sprites and the weakness, resistance, and immunity labels are made once and reused for every pokemon.
+        # The icons they show are kept alive by the shared TypeIconAtlas
+        self.type_one_sprite = tk.Label(self.pokemon_sprite_frame, bg=self.poke_app.current_bg_color)
+        self.type_one_sprite.grid(column=1, row=2)
+        self.type_two_sprite = tk.Label(self.pokemon_sprite_frame, bg=self.poke_app.current_bg_color)
+        self.type_two_sprite.grid(column=2, row=2)
+        self.type_two_sprite.grid_remove()
+        # HP, status, and boosts of the pokemon in a watched battle, shown once there are any
+        self.battle_status_label = tk.Label(self.pokemon_sprite_frame, bg=self.poke_app.current_bg_color,
+                                            fg=self.poke_app.current_fg_color)
+        self.battle_status_label.grid(column=1, row=3, columnspan=2)
+        self.battle_status_label.grid_remove()
+        # Speed range and how it compares to the other side, from StatEngine
+        self.speed_tier_label = tk.Label(self.pokemon_sprite_frame, bg=self.poke_app.current_bg_color,
+                                         fg=self.poke_app.current_fg_color)
+        self.speed_tier_label.grid(column=1, row=4, columnspan=2)
+        self.type_label_pools = {1: [], 2: [], 3: []}   # column -> labels, shown from the top down
+        self.shown_types = ()
+        self.shown_matchups = {1: (), 2: (), 3: ()}     # column -> tuple of (type, is quad) shown in it
+        self.labels_created = 0     # Number of pooled labels made, stops going up once every column is big enough
 
         # Sets up stuff for stat display
         self.stat_frame = tk.Frame(self.master, bg=self.poke_app.current_bg_color)
@@ -109,154 +178,117 @@ class PokemonDisplay(tk.Frame):
             "SPD": "#f85888"
         }
         self.create_stat_display()
-        self.change_pokemon(pokemon)
+        self.request_pokemon(pokemon)
 
         # Adds all widgets to their respective color group in Pokeapp for changing theme
-        self.poke_app.regular_bg_group.extend((self.stat_frame, self.pokemon_sprite_frame, self.pokemon_sprite,
-                                               self.pokemon_name_label, self.type_frame, self.weaknesses_title,
-                                               self.resistances_title, self.immunities_title))
-        self.poke_app.regular_fg_group.extend((self.weaknesses_title, self.resistances_title, self.immunities_title,
-                                               self.pokemon_name_label))
-
-    def update_sprite(self):
-        """
-        Updates the current sprite to whatever is set as the current pokemon
-        """
-        try:
-            new_sprite_url = requests.get(self.pokemon_data.sprites.front_default)
-            new_sprite_bytes = Image.open(BytesIO(new_sprite_url.content))
-            new_sprite = ImageTk.PhotoImage(new_sprite_bytes)
-            self.pokemon_sprite.configure(image=new_sprite)
-            self.pokemon_sprite.image = new_sprite
-        except requests.exceptions.MissingSchema:
-            new_sprite = ImageTk.PhotoImage(Image.open('no_picture.png'))
-            self.pokemon_sprite.configure(image=new_sprite)
-            self.pokemon_sprite.image = new_sprite
-
-    def update_type_relationships(self):
+        for widget in (self.stat_frame, self.pokemon_sprite_frame, self.pokemon_sprite, self.type_frame,
+                       self.type_one_sprite, self.type_two_sprite):
+            self.poke_app.theme.register(widget, "bg")
+        for widget in (self.pokemon_name_label, self.battle_status_label, self.speed_tier_label,
+                       self.weaknesses_title, self.resistances_title, self.immunities_title):
+            self.poke_app.theme.register(widget, "bg", "fg")
+
+    def show_battle_status(self, status):
         """
-        Updates the type relationships (weaknesses and resistances) for whatever is set as the current pokemon, as
-        well as changes the types on display
+        Shows the HP, status, and boosts of the pokemon in a watched battle under its types
+        :param status: Line from BattleState.PokemonState.describe, empty to hide it
+        :return: None
         """
-        # Changes the types on display
-        types = self.pokemon_data.types
-
-        try:
-            self.poke_app.regular_bg_group.remove(self.type_one_sprite)
-        except ValueError:
-            pass
-
-        self.type_one_render = ImageTk.PhotoImage(Image.open('type_images/{}.png'.format(str(types[0].type.name))))
-        self.type_one_sprite = tk.Label(self.pokemon_sprite_frame, image=self.type_one_render,
-                                        bg=self.poke_app.current_bg_color)
-        self.type_one_sprite.grid(column=1, row=2)
-        self.poke_app.regular_bg_group.append(self.type_one_sprite)
-
-        if len(types) == 2:
-            try:
-                self.poke_app.regular_bg_group.remove(self.type_two_sprite)
-            except ValueError:
-                pass
-            self.type_two_render = ImageTk.PhotoImage(Image.open('type_images/{}.png'.format(str(types[1].type.name))))
-            self.type_two_sprite = tk.Label(self.pokemon_sprite_frame, image=self.type_two_render,
-                                            bg=self.poke_app.current_bg_color)
-            self.type_two_sprite.grid(column=2, row=2)
-            self.poke_app.regular_bg_group.append(self.type_two_sprite)
+        if status == self.battle_status_label.cget("text"):
+            return
+        self.battle_status_label.configure(text=status)
+        if status:
+            self.battle_status_label.grid()
         else:
-            try:
-                self.type_two_sprite.grid_forget()
-            except AttributeError:
-                pass    # Happens when loading a pokemon with one type first, as NoneType can't .grid_forget()
-
-        # Determines the weaknesses, resistances, and immunities
-        all_weaknesses = []
-        all_resistances = []
-        immunities = []
-        quad_weaknesses = []
-        quad_resistances = []
-
-        for i in range(len(types)):
-            for j in self.poke_client.get_type(types[i].type.name).damage_relations.double_damage_from:
-                all_weaknesses.append(j.name)
-            for k in self.poke_client.get_type(types[i].type.name).damage_relations.half_damage_from:
-                all_resistances.append(k.name)
-            for l in self.poke_client.get_type(types[i].type.name).damage_relations.no_damage_from:
-                immunities.append(l.name)
-
-        weaknesses = [x for x in all_weaknesses if x not in all_resistances]
-        resistances = [x for x in all_resistances if x not in all_weaknesses]
-
-        for i in weaknesses:
-            if weaknesses.count(i) > 1 and i not in quad_weaknesses:
-                quad_weaknesses.append(i)
-                weaknesses.remove(i)
-
-        for i in resistances:
-            if resistances.count(i) > 1 and i not in quad_resistances:
-                quad_resistances.append(i)
-                resistances.remove(i)
-
-        for i in immunities:
-            if i in weaknesses:
-                weaknesses.remove(i)
-            if i in resistances:
-                resistances.remove(i)
-
-        for i in self.weakness_labels, self.resistance_labels, self.immunity_labels:
-            for j in i:
-                try:
-                    self.poke_app.regular_bg_group.remove(j)
-                except ValueError:
-                    pass
-                j.destroy()
-
-        self.resistance_labels = []
-        self.weakness_labels = []
-        self.immunity_labels = []
-
-        weaknesses.sort()       # Sorts types alphabetically
-        resistances.sort()
-        immunities.sort()
-
-        # Creates all the type icons for weaknesses, resistances, and immunities
-        self.make_type_icons(weaknesses, quad_weaknesses, self.weakness_labels, 1)
-        if len(weaknesses) == 0:
-            self.weaknesses_title.grid_remove()
-        else:
-            self.weaknesses_title.grid()
+            self.battle_status_label.grid_remove()
 
-        self.make_type_icons(resistances, quad_resistances, self.resistance_labels, 2)
-        if len(resistances) == 0:
-            self.resistances_title.grid_remove()
-        else:
-            self.resistances_title.grid()
+    def show_speed_tier(self, speed_tier):
+        """
+        Shows the pokemon's speed range and how it compares to the other side under its battle status
+        :param speed_tier: Line from StatEngine.StatEngine.describe_speed
+        :return: None
+        """
+        if speed_tier != self.speed_tier_label.cget("text"):
+            self.speed_tier_label.configure(text=speed_tier)
 
-        if len(immunities) > 0:
-            self.make_type_icons(immunities, [], self.immunity_labels, 3)
-            self.immunities_title.grid(column=3, row=1)
+    def update_sprite(self, new_sprite_image):
+        """
+        Updates the current sprite to the one of the current pokemon
+        :param new_sprite_image: Decoded PIL image of the sprite, None if the pokemon has no sprite
+        """
+        if new_sprite_image is None:
+            new_sprite = self.poke_app.type_icons.no_picture_sprite
         else:
-            self.immunities_title.grid_forget()
+            new_sprite = ImageTk.PhotoImage(new_sprite_image)
+        self.pokemon_sprite.configure(image=new_sprite)
+        self.pokemon_sprite.image = new_sprite
 
-    def make_type_icons(self, main_list, quad_list, label_list, column):
+    def update_type_relationships(self, matchups=None):
         """
-        Makes the type icons for weaknesses, resistances, or immunities
-        :param main_list: List of all types for group
-        :param quad_list: List of quad types for group (quad weaknesses / quad resistances)
-        :param label_list: List to add the type labels to
-        :param column: Int column to start the labels at
-        :return: None
+        Updates the type relationships (weaknesses and resistances) for whatever is set as the current pokemon, as
+        well as changes the types on display. Labels are reused, only the ones whose icon changed are updated
+        :param matchups: Dict from TypeChart.type_matchups for the current pokemon, worked out here if None
         """
-        for i in range(len(main_list)):
-            label_image = Image.open('type_images/{}.png'.format(str(main_list[i])))
-            label_render = ImageTk.PhotoImage(label_image)
-            label = tk.Label(self.type_frame, image=label_render, bg=self.poke_app.current_bg_color)
-            if main_list[i] in quad_list:
-                label.configure(relief='raised', bd=3, bg='IndianRed1')
+        # Changes the types on display
+        types = self.pokemon_data.type_names
+        if types != self.shown_types:
+            self.type_one_sprite.configure(image=self.poke_app.type_icons.icon(types[0]))
+            if len(types) == 2:
+                self.type_two_sprite.configure(image=self.poke_app.type_icons.icon(types[1]))
+                self.type_two_sprite.grid()
             else:
-                self.poke_app.regular_bg_group.append(label)
-            label.image = label_render
-            label.grid(column=column, row=2+i)
-            label_list.append(label)
+                self.type_two_sprite.grid_remove()
+            self.shown_types = types
+
+        # Determines the weaknesses, resistances, and immunities from the precomputed type chart
+        if matchups is None:
+            from TypeChart import type_matchups
+            matchups = type_matchups(types)
+
+        # Each column is a tuple of (type, is quad) so two pokemon with the same matchups compare equal
+        columns = {
+            1: tuple((x, x in matchups["quad_weaknesses"]) for x in matchups["weaknesses"]),
+            2: tuple((x, x in matchups["quad_resistances"]) for x in matchups["resistances"]),
+            3: tuple((x, False) for x in matchups["immunities"]),
+        }
+        titles = {1: self.weaknesses_title, 2: self.resistances_title, 3: self.immunities_title}
+        for column, icons in columns.items():
+            shown = self.shown_matchups[column]
+            if icons == shown:
+                continue
+            if bool(icons) != bool(shown):
+                if icons:
+                    titles[column].grid()
+                else:
+                    titles[column].grid_remove()
+            self.update_type_column(column, icons, shown)
+            self.shown_matchups[column] = icons
+
+    def update_type_column(self, column, icons, shown):
+        """
+        Changes the icons of one weakness, resistance, or immunity column, reusing its pool of labels
+        :param column: Int column, 1 for weaknesses, 2 for resistances, 3 for immunities
+        :param icons: Tuple of (type, is quad) to show
+        :param shown: Tuple of (type, is quad) shown now
+        :return: None
+        """
+        pool = self.type_label_pools[column]
+        while len(pool) < len(icons):   # Only grows the first time a column needs more labels than it has had
+            label = tk.Label(self.type_frame, bg=self.poke_app.current_bg_color)
+            label.grid(column=column, row=2 + len(pool))
+            self.poke_app.theme.register(label, "bg")
+            pool.append(label)
+            self.labels_created += 1
+
+        for i, label in enumerate(pool):
+            if i < len(icons):
+                if i >= len(shown) or shown[i] != icons[i]:
+                    # Quad types use the highlighted variant of the icon from the shared atlas
+                    label.configure(image=self.poke_app.type_icons.icon(*icons[i]))
+                if i >= len(shown):
+                    label.grid()
+            elif i < len(shown):
+                label.grid_remove()
 
     # noinspection PyTypeChecker
     def create_stat_display(self):
@@ -265,8 +297,7 @@ class PokemonDisplay(tk.Frame):
             self.stat_labels[stat] = tk.Label(self.stat_frame, text=stat, bg=self.poke_app.current_bg_color,
                                               fg=self.poke_app.current_fg_color)
             self.stat_labels[stat].grid(column=1, row=row, sticky='W')
-            self.poke_app.regular_bg_group.append(self.stat_labels[stat])
-            self.poke_app.regular_fg_group.append(self.stat_labels[stat])
+            self.poke_app.theme.register(self.stat_labels[stat], "bg", "fg")
             row += 1
 
         row = 1     # Initial row for the stat_bars in the self.stat_frame
@@ -291,8 +322,7 @@ class PokemonDisplay(tk.Frame):
             self.stat_value_labels[stat] = tk.Label(self.stat_frame, text="0", bg=self.poke_app.current_bg_color,
                                                     fg=self.poke_app.current_fg_color)
             self.stat_value_labels[stat].grid(column=3, row=row, sticky='W')
-            self.poke_app.regular_bg_group.append(self.stat_value_labels[stat])
-            self.poke_app.regular_fg_group.append(self.stat_value_labels[stat])
+            self.poke_app.theme.register(self.stat_value_labels[stat], "bg", "fg")
             current_stat -= 1
             row += 1
 
@@ -300,15 +330,13 @@ class PokemonDisplay(tk.Frame):
         """
         Updates the stats for whatever is set as the current pokemon
         """
-        stats = self.pokemon_data.stats
-        current_stat = 5
-        for stat in self.stat_bars:
+        # Bars are in the same order as SpeciesRecord.STATS, HP first
+        for stat, base_stat in zip(self.stat_bars, self.pokemon_data.base_stats):
             self.stat_bar_canvases[stat].coords(self.stat_bars[stat], 0, 0,
-                                                (stats[current_stat].base_stat / self.stat_max_value) * self.stat_bar_width,
+                                                (base_stat / self.stat_max_value) * self.stat_bar_width,
                                                 self.stat_bar_height)
 
-            self.stat_value_labels[stat].config(text=str(stats[current_stat].base_stat))
-            current_stat -= 1
+            self.stat_value_labels[stat].config(text=str(base_stat))
 
     def remove_stat_display(self):
         """
@@ -322,31 +350,13 @@ class PokemonDisplay(tk.Frame):
         """
         self.stat_frame.grid()
 
-    def change_pokemon(self, pokemon):
-        try:
-            if "**" in pokemon:     # Used to change type of pokemon (for Arceus, Silvally, and Genesect)
-                split_string = pokemon.split("**")
-                self.current_pokemon = split_string[0]
-                self.pokemon_name_label.config(text=self.current_pokemon.capitalize())
-                self.pokemon_data = self.poke_client.get_pokemon(split_string[0])
-                self.pokemon_data.types[0].type.name = split_string[1]
-                if len(split_string) == 3:
-                    self.pokemon_data.types[1].type.name = split_string[2]
-                self.update_sprite()
-                self.update_type_relationships()
-                self.update_stats()
-            else:
-                self.pokemon_data = self.poke_client.get_pokemon(pokemon)
-                self.current_pokemon = pokemon
-                self.pokemon_name_label.config(text=self.current_pokemon.capitalize())
-                self.update_sprite()
-                self.update_type_relationships()
-                self.update_stats()
-            return True
-        except beckett.exceptions.InvalidStatusCodeError:
-            # This happpens when an entry that is not in PokeAPI goes through
-            Popup.create_popup(self.poke_app.real_root, "That pokemon is not supported",
-                               bg=self.poke_app.current_fg_color, window_border_thickness=1,
-                               label_bg=self.poke_app.current_fg_color, label_fg="black",
-                               button_bg=self.poke_app.current_bg_color, button_fg="white",
-                               button_active_bg=self.poke_app.current_fg_color, button_active_fg="black")
+    def render(self, result):
+        """
+        Shows a finished lookup on the widgets
+        :param result: LookupPipeline.LookupResult without an error
+        :return: None
+        """
+        self.pokemon_name_label.config(text=self.current_pokemon.capitalize())
+        self.update_sprite(result.sprite_image)
+        self.update_type_relationships(result.matchups)
+        self.update_stats()
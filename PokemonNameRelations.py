@@ -24,7 +24,7 @@ name_relations = {
     "basculin": "basculin-red-striped",
     "shaymin": "shaymin-land",
     "keldeo": "keldeo-ordinary",
-    "darmnanitan": "darmanitan-standard",
+    "darmanitan": "darmanitan-standard",
     "meloetta": "meloetta-aria",
     "necrozma-dawn-wings": "necrozma-dawn",
     "necrozma-dusk-mane": "necrozma-dusk",
@@ -34,6 +34,49 @@ name_relations = {
     "landorus": "landorus-incarnate",
     "wishiwashi": "wishiwashi-school",
 
+    # Showdown names PokeAPI spells differently
+    "darmanitan-galar": "darmanitan-galar-standard",
+    "tauros-paldea-combat": "tauros-paldea-combat-breed",
+    "tauros-paldea-blaze": "tauros-paldea-blaze-breed",
+    "tauros-paldea-aqua": "tauros-paldea-aqua-breed",
+    "ogerpon-wellspring": "ogerpon-wellspring-mask",
+    "ogerpon-hearthflame": "ogerpon-hearthflame-mask",
+    "ogerpon-cornerstone": "ogerpon-cornerstone-mask",
+    "ogerpon-teal-tera": "ogerpon",
+    "ogerpon-wellspring-tera": "ogerpon-wellspring-mask",
+    "ogerpon-hearthflame-tera": "ogerpon-hearthflame-mask",
+    "ogerpon-cornerstone-tera": "ogerpon-cornerstone-mask",
+    "urshifu": "urshifu-single-strike",
+    "indeedee": "indeedee-male",
+    "indeedee-f": "indeedee-female",
+    "meowstic": "meowstic-male",
+    "meowstic-f": "meowstic-female",
+    "basculegion": "basculegion-male",
+    "basculegion-f": "basculegion-female",
+    "oinkologne": "oinkologne-male",
+    "oinkologne-f": "oinkologne-female",
+    "eiscue": "eiscue-ice",
+    "morpeko": "morpeko-full-belly",
+    "mimikyu": "mimikyu-disguised",
+    "toxtricity": "toxtricity-amped",
+    "minior": "minior-red-meteor",
+    "minior-meteor": "minior-red-meteor",
+    "wormadam": "wormadam-plant",
+    "gourgeist": "gourgeist-average",
+    "pumpkaboo": "pumpkaboo-average",
+    "oricorio": "oricorio-baile",
+    "greninja-bond": "greninja-battle-bond",
+    "maushold": "maushold-family-of-three",
+    "maushold-four": "maushold-family-of-four",
+    "dudunsparce": "dudunsparce-two-segment",
+    "squawkabilly": "squawkabilly-green-plumage",
+    "squawkabilly-blue": "squawkabilly-blue-plumage",
+    "squawkabilly-yellow": "squawkabilly-yellow-plumage",
+    "squawkabilly-white": "squawkabilly-white-plumage",
+    "palafin": "palafin-zero",
+    "tatsugiri": "tatsugiri-curly",
+    "enamorus": "enamorus-incarnate",
+
     "arceus-fighting": "arceus**fighting",
     "arceus-flying": "arceus**flying",
     "arceus-poison": "arceus**poison",
@@ -46,11 +89,11 @@ name_relations = {
     "arceus-water": "arceus**water",
     "arceus-grass": "arceus**grass",
     "arceus-electric": "arceus**electric",
-    "arceus-pyschic": "arceus**psychic",
+    "arceus-psychic": "arceus**psychic",
     "arceus-ice": "arceus**ice",
     "arceus-dragon": "arceus**dragon",
     "arceus-dark": "arceus**dark",
-    "arceus-fairy": "arceus**fariy",
+    "arceus-fairy": "arceus**fairy",
 
     "silvally-fighting": "silvally**fighting",
     "silvally-flying": "silvally**flying",
@@ -64,14 +107,26 @@ name_relations = {
     "silvally-water": "silvally**water",
     "silvally-grass": "silvally**grass",
     "silvally-electric": "silvally**electric",
-    "silvally-pyschic": "silvally**psychic",
+    "silvally-psychic": "silvally**psychic",
     "silvally-ice": "silvally**ice",
     "silvally-dragon": "silvally**dragon",
     "silvally-dark": "silvally**dark",
-    "silvally-fairy": "silvally**fariy",
+    "silvally-fairy": "silvally**fairy",
 
     "genesect-burn": "genesect**fire",
     "genesect-shock": "genesect**electric",
     "genesect-chill": "genesect**ice",
     "genesect-douse": "genesect**water"
-}
\ No newline at end of file
+}
+
+# Formes that only change how a pokemon looks, so an index that doesn't know one can show its base pokemon instead.
+# Every forme of cosmetic_species is cosmetic, cosmetic_formes are single formes of pokemon with other real formes
+cosmetic_species = (
+    "gastrodon", "shellos", "vivillon", "alcremie", "furfrou", "flabébé", "florges", "sawsbuck", "deerling", "burmy",
+    "unown", "cherrim", "xerneas", "sinistea", "polteageist", "poltchageist", "sinistcha",
+)
+cosmetic_formes = (
+    "floette-blue", "floette-orange", "floette-white", "floette-yellow",
+    "pikachu-original", "pikachu-hoenn", "pikachu-sinnoh", "pikachu-unova", "pikachu-kalos", "pikachu-alola",
+    "pikachu-partner", "pikachu-world",
+)
@@ -0,0 +1,5 @@
+# The 18 types, kept apart from TypeChart so naming types doesn't need NumPy loaded
+TYPES = ("normal", "fire", "water", "electric", "grass", "ice", "fighting", "poison", "ground", "flying", "psychic",
+         "bug", "rock", "ghost", "dragon", "dark", "steel", "fairy")
+TYPE_INDEX = {name: index for index, name in enumerate(TYPES)}
+NO_TYPE = len(TYPES)    # Index used for the missing second type of single type pokemon
@@ -0,0 +1,106 @@
+import heapq
+import random
+import string
+import time
+from bisect import bisect_left
+
+
+class PrefixIndex:
+    """
+    Index of autocomplete entries that finds the entries starting with a prefix by binary search over a sorted copy,
+    and checks for exact entries with a set. Built once, then each lookup is O(log n + k) for k results
+    -----
+    entries: list
+        - Entries to index, already lowercased
+    alphabetical: boolean
+        - Whether results come back alphabetically (True) or in the order of entries (False)
+    """
+
+    def __init__(self, entries, alphabetical=False):
+        self.alphabetical = alphabetical
+        self.entry_set = set(entries)
+        # Sorted entries, and the position of each in the given list so results can be put back in that order
+        order = sorted(range(len(entries)), key=lambda x: entries[x])
+        self.sorted_entries = [entries[i] for i in order]
+        self.positions = order
+
+    def __contains__(self, entry):
+        return entry in self.entry_set
+
+    def __len__(self):
+        return len(self.sorted_entries)
+
+    def prefix_range(self, prefix, within=None):
+        """
+        Finds where the entries starting with prefix are in self.sorted_entries
+        :param prefix: Lowercase prefix
+        :param within: Range from an earlier call for a shorter part of prefix, only that range is searched
+        :return: Tuple (start, end) of the slice of matching entries
+        """
+        low, high = within if within is not None else (0, len(self.sorted_entries))
+        start = bisect_left(self.sorted_entries, prefix, low, high)
+        end = bisect_left(self.sorted_entries, prefix + "\U0010ffff", start, high)   # Sorts after anything with prefix
+        return start, end
+
+    def matches(self, prefix, limit=None):
+        """
+        Gets the entries that start with prefix
+        :param prefix: Lowercase prefix
+        :param limit: Max number of entries to return, None for all of them
+        :return: List of entries, alphabetical or in the given order depending on self.alphabetical
+        """
+        return self.range_matches(self.prefix_range(prefix), limit)
+
+    def range_matches(self, prefix_range, limit=None):
+        """
+        Gets the entries in a range from self.prefix_range
+        :param prefix_range: Tuple (start, end)
+        :param limit: Max number of entries to return, None for all of them
+        :return: List of entries, alphabetical or in the given order depending on self.alphabetical
+        """
+        start, end = prefix_range
+        if self.alphabetical:
+            return self.sorted_entries[start:end if limit is None else min(end, start + limit)]
+        # In the given order, every match has to be looked at to find the first ones
+        matched = zip(self.positions[start:end], self.sorted_entries[start:end])
+        matched = sorted(matched) if limit is None else heapq.nsmallest(limit, matched)
+        return [entry for __, entry in matched]
+
+
+def benchmark_keystrokes(entry_count=100000, words_typed=2000, limit=4, seed=0):
+    """
+    Times autocomplete lookups for every keystroke of typing random entries, against the old full scan
+    :param entry_count: Number of entries in the index
+    :param words_typed: Number of entries typed one character at a time
+    :param limit: Guesses asked for per keystroke
+    :param seed: Random seed so runs are comparable
+    :return: Dict of mean and worst lookup time per keystroke in microseconds for the index and the scan
+    """
+    rng = random.Random(seed)
+    entries = sorted({"".join(rng.choice(string.ascii_lowercase + "-") for __ in range(rng.randint(4, 16)))
+                      for __ in range(entry_count)})
+    index = PrefixIndex(entries, alphabetical=True)
+    typed = [entry[:i] for entry in rng.sample(entries, words_typed) for i in range(1, len(entry) + 1)]
+
+    def time_lookups(lookup, prefixes):
+        times = []
+        for prefix in prefixes:
+            start = time.perf_counter()
+            lookup(prefix)
+            times.append(time.perf_counter() - start)
+        return sum(times) / len(times) * 1e6, max(times) * 1e6
+
+    def full_scan(prefix):     # How EntryAutoFill.guess_input found guesses before the index
+        return prefix in entries or [x for x in entries if x[:len(prefix)] == prefix]
+
+    index_mean, index_worst = time_lookups(lambda x: (x in index, index.matches(x, limit)), typed)
+    scan_mean, scan_worst = time_lookups(full_scan, typed[::max(1, len(typed) // 200)])
+    return {"entries": len(entries), "keystrokes": len(typed), "index_mean_us": index_mean,
+            "index_worst_us": index_worst, "scan_mean_us": scan_mean, "scan_worst_us": scan_worst}
+
+
+if __name__ == "__main__":
+    results = benchmark_keystrokes()
+    print("{entries} entries, {keystrokes} keystrokes".format(**results))
+    print("Prefix index: {index_mean_us:.1f} us mean, {index_worst_us:.1f} us worst per keystroke".format(**results))
+    print("Full scan:    {scan_mean_us:.1f} us mean, {scan_worst_us:.1f} us worst per keystroke".format(**results))
@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+from ShowdownProtocol import Switch, TeamPreviewPokemon, Player, BattleEnd, parse_log, read_battle_log
+
+REPLAY_EXTENSIONS = (".log", ".html", ".htm")
+
+
+def find_replays(paths):
+    """
+    Finds every saved replay under the given files and folders, without listing them all up front
+    :param paths: Iterable of file or folder paths
+    :return: Generator of replay file paths
+    """
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for folder, __, files in os.walk(path):
+            for name in files:
+                if name.lower().endswith(REPLAY_EXTENSIONS):
+                    yield os.path.join(folder, name)
+
+
+def summarize_battle(lines):
+    """
+    Works out the team reveals, leads, and switch counts of a battle
+    :param lines: Iterable of protocol lines
+    :return: Dict with "players", "team_preview" and "revealed" (species per side, in order of appearance),
+             "leads", "switches" (switch ins per side after the leads), "winner", and "ended"
+    """
+    players = {}
+    team_preview = {}
+    revealed = {}
+    leads = {}
+    switches = {}
+    winner = None
+    ended = False
+
+    for event in parse_log(lines):
+        if isinstance(event, Switch):
+            side_revealed = revealed.setdefault(event.side, [])
+            if event.species not in side_revealed:
+                side_revealed.append(event.species)
+            if event.kind == "replace":
+                continue    # Illusion being broken, the pokemon was already in
+            lead_key = event.side + event.position
+            if lead_key not in leads:
+                leads[lead_key] = event.species
+            else:
+                switches[event.side] = switches.get(event.side, 0) + 1
+        elif isinstance(event, TeamPreviewPokemon):
+            team_preview.setdefault(event.side, []).append(event.species)
+        elif isinstance(event, Player):
+            players[event.side] = event.name
+        elif isinstance(event, BattleEnd):
+            winner = event.winner
+            ended = True
+
+    return {
+        "players": players,
+        "team_preview": team_preview,
+        "revealed": revealed,
+        "leads": leads,
+        "switches": switches,
+        "winner": winner,
+        "ended": ended,
+    }
+
+
+def summarize_file(path):
+    """
+    Summarizes one saved replay, ran in the worker processes
+    :param path: Path to a .log or .html replay
+    :return: Dict from summarize_battle with the "file" added, or with "error" set if it couldn't be read
+    """
+    try:
+        summary = summarize_battle(read_battle_log(path))
+    except (OSError, ValueError) as error:
+        return {"file": path, "error": str(error)}
+    summary["file"] = path
+    return summary
+
+
+def ingest(paths, output, processes=None, chunksize=64):
+    """
+    Summarizes every replay under paths across a process pool and writes one JSON line per battle to output. Files
+    are read by the workers, so only paths and small summaries move between processes
+    :param paths: Iterable of replay files or folders
+    :param output: Writable text file for the JSON lines
+    :param processes: Number of worker processes, defaults to the number of cores
+    :param chunksize: Number of files handed to a worker at a time
+    :return: Int number of battles written
+    """
+    count = 0
+    with Pool(processes=processes) as pool:
+        for summary in pool.imap_unordered(summarize_file, find_replays(paths), chunksize=chunksize):
+            output.write(json.dumps(summary))
+            output.write("\n")
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extracts team reveals, leads, and switch counts from saved "
+                                                 "Pokemon Showdown replays (.log or .html) as JSON lines")
+    parser.add_argument("paths", nargs="+", help="Replay files or folders of them")
+    parser.add_argument("-o", "--output", help="File to write the JSON lines to, defaults to stdout")
+    parser.add_argument("-j", "--processes", type=int, default=None, help="Worker processes, defaults to core count")
+    parser.add_argument("--chunksize", type=int, default=64, help="Files handed to a worker at a time")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.output is None:
+        written = ingest(args.paths, sys.stdout, args.processes, args.chunksize)
+    else:
+        with open(args.output, "w", encoding="utf-8") as out_file:
+            written = ingest(args.paths, out_file, args.processes, args.chunksize)
+    elapsed = time.perf_counter() - start
+    print("Summarized {} battles in {:.2f}s ({:.0f} battles/s)".format(written, elapsed, written / max(elapsed, 1e-9)),
+          file=sys.stderr)
@@ -0,0 +1,143 @@
+import asyncio
+import sys
+import websockets
+from ShowdownProtocol import split_message, parse_line, read_battle_log
+
+DEFAULT_SERVER_URL = "wss://sim3.psim.us/showdown/websocket"
+
+
+class ShowdownClient:
+    """
+    Asyncio websocket client that speaks the Pokemon Showdown protocol. Joins battle rooms and hands the events in
+    them to on_event as they arrive
+    -----
+    on_event: function
+        - Called with (room, event) for every event ShowdownProtocol.parse_line finds in a joined room
+    server_url: string
+        - Websocket url of the Showdown server, can be a local stand-in made with serve_replay
+    """
+
+    def __init__(self, on_event, server_url=DEFAULT_SERVER_URL):
+        self.on_event = on_event
+        self.server_url = server_url
+        self.websocket = None
+        self.rooms = set()
+
+    async def connect(self):
+        """
+        Connects to the server and rejoins every room that was joined before
+        :return: None
+        """
+        self.websocket = await websockets.connect(self.server_url, max_size=None)
+        for room in self.rooms:
+            await self.send("|/join {}".format(room))
+
+    async def send(self, text):
+        """
+        Sends a message to the server if connected
+        :param text: Message like "|/join battle-gen8ou-1234"
+        :return: None
+        """
+        if self.websocket is not None:
+            await self.websocket.send(text)
+
+    async def join(self, room):
+        """
+        Joins a battle room, the server replies with the whole battle so far and then every new line
+        :param room: Room ID like battle-gen8ou-1234
+        :return: None
+        """
+        self.rooms.add(room)
+        await self.send("|/join {}".format(room))
+
+    async def leave(self, room):
+        """
+        Leaves a battle room
+        :param room: Room ID
+        :return: None
+        """
+        if room in self.rooms:
+            self.rooms.remove(room)
+            await self.send("|/leave {}".format(room))
+
+    async def listen(self):
+        """
+        Reads messages until the connection closes
+        :return: None
+        """
+        async for message in self.websocket:
+            self.handle_message(message)
+
+    def handle_message(self, message):
+        """
+        Parses a message from the server and hands its events to self.on_event
+        :param message: Raw websocket message
+        :return: None
+        """
+        room, lines = split_message(message)
+        if room not in self.rooms:
+            return
+        for line in lines:
+            event = parse_line(line)
+            if event is not None:
+                self.on_event(room, event)
+
+    async def close(self):
+        """
+        Closes the connection
+        :return: None
+        """
+        if self.websocket is not None:
+            await self.websocket.close()
+            self.websocket = None
+
+
+async def serve_replay(log_path, host="localhost", port=8000, delay=0.0):
+    """
+    Local stand-in for a Showdown server. Replays a recorded battle log into any room a client joins, used to try
+    ShowdownClient without a real battle
+    :param log_path: Path to the recorded log, a replay's .log or .html
+    :param host: Host to serve on
+    :param port: Port to serve on
+    :param delay: Seconds to wait between lines, 0 sends the whole log at once
+    :return: None, serves until cancelled
+    """
+    lines = read_battle_log(log_path)
+
+    async def handler(websocket, path=None):
+        async for message in websocket:
+            if message.startswith("|/join "):
+                room = message[len("|/join "):].strip()
+                if delay == 0:
+                    await websocket.send(">{}\n{}".format(room, "\n".join(lines)))
+                else:
+                    for line in lines:
+                        await websocket.send(">{}\n{}".format(room, line))
+                        await asyncio.sleep(delay)
+
+    async with websockets.serve(handler, host, port):
+        await asyncio.Future()
+
+
+async def print_room_events(room, server_url):
+    """
+    Joins a room and prints its events, used from the command line
+    :return: None
+    """
+    client = ShowdownClient(lambda event_room, event: print(event_room, event), server_url)
+    await client.connect()
+    await client.join(room)
+    await client.listen()
+
+
+if __name__ == "__main__":
+    # Usage: python ShowdownClient.py serve <log file> [port]
+    #        python ShowdownClient.py watch <room ID> [server url]
+    if len(sys.argv) >= 3 and sys.argv[1] == "serve":
+        asyncio.run(serve_replay(sys.argv[2], port=int(sys.argv[3]) if len(sys.argv) > 3 else 8000, delay=0.5))
+    elif len(sys.argv) >= 3 and sys.argv[1] == "watch":
+        asyncio.run(print_room_events(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else DEFAULT_SERVER_URL))
+    else:
+        print("Usage: python ShowdownClient.py serve <log file> [port]\n"
+              "       python ShowdownClient.py watch <room ID> [server url]")
+        sys.exit(1)
@@ -1,82 +1,348 @@
-import selenium
-from selenium import webdriver
-from selenium.common.exceptions import NoSuchElementException
-from selenium.webdriver.firefox.options import Options
-import time
+import asyncio
 import threading
-from PokemonNameRelations import name_relations
+import time
+import websockets
+from BattleState import BattleState, BOOST_INDEX
+from ShowdownClient import ShowdownClient, DEFAULT_SERVER_URL
+from SwitchEvents import SINGLES_SLOTS
+from ShowdownProtocol import Switch, TeamPreviewPokemon, TeamPreview, Player, BattleEnd, room_from_url
+
+
+class BattleRoom:
+    """
+    What's known about one watched battle, kept small as one exists per watched battle
+    """
+    __slots__ = ("room", "player_one", "player_two", "active", "winner", "ended", "team_preview",
+                 "preview_started", "preview_warm_time", "state")
+
+    def __init__(self, room):
+        self.room = room
+        self.player_one = ""
+        self.player_two = ""
+        self.active = {}    # (side, position) -> (data key or None if it isn't known, Showdown species) sent out there
+        self.winner = None
+        self.ended = False
+        self.team_preview = []  # Data keys of both teams from Team Preview
+        self.preview_started = None     # time.perf_counter() the first Team Preview pokemon came in at
+        self.preview_warm_time = None   # Seconds from then until every Team Preview pokemon was prefetched
+        # HP, status, boosts, and the field, built from every event in the room. Never rewound, so nothing is logged
+        # for it and its memory stays flat however long the battle goes
+        self.state = BattleState(record=False)
+
+    def summary_row(self):
+        """
+        Gets the row shown for this battle in BattleSummary
+        :return: Tuple (room, player one, player one pokemon, player two, player two pokemon, status)
+        """
+        if not self.ended:
+            status = "Playing"
+        else:
+            status = "{} won".format(self.winner) if self.winner is not None else "Tie"
+        return (self.room, self.player_one, self.side_pokemon("p1"), self.player_two, self.side_pokemon("p2"),
+                status)
+
+    def side_pokemon(self, side):
+        """
+        Gets the active pokemon of a side for the summary table
+        :param side: Side like "p1"
+        :return: String like "landorus-therian / Tapu Koko", empty if nothing was sent out yet
+        """
+        return " / ".join(self.active[slot][0] or self.active[slot][1] for slot in sorted(self.active)
+                          if slot[0] == side)
+
+    def slots(self):
+        """
+        Gets the displays this battle uses, one for every position a pokemon has been sent out to
+        :return: Tuple of (side, position) slots in display order, SINGLES_SLOTS before anything is sent out
+        """
+        return tuple(sorted(self.active)) or SINGLES_SLOTS
 
 
 class ShowdownListener(threading.Thread):
-    def __init__(self, pokeapp):
-        threading.Thread.__init__(self)
-        self.do_stop = False
+    """
+    Thread that follows any number of Pokemon Showdown battles over one Showdown websocket connection. The pokemon
+    switched in to the focused battle and their HP, status, and boosts are published to pokeapp.switch_events, every
+    battle's state is kept in a BattleRoom and changes to them can be taken for the summary table with
+    take_room_updates
+    -----
+    pokeapp: PokeApp
+        - App to publish switches to
+    server_url: string
+        - Websocket url of the Showdown server
+    """
+
+    def __init__(self, pokeapp, server_url=DEFAULT_SERVER_URL):
+        threading.Thread.__init__(self, daemon=True)
+        self.stop_event = threading.Event()     # Set by self.stop
         self.pokeapp = pokeapp
         self.url = None
-        options = Options()
-        options.headless = True
-        self.browser = webdriver.Firefox(options=options)
-        self.previous_chat = []
-        self.player_one = ""
-        self.player_two = ""
-        self.player_one_pokemon = ""
-        self.player_two_pokemon = ""
-
-        self.update_url = False
-
-    @staticmethod
-    def process_name(name):
-        if name[-1:] == ")":
-            actual_name = name.split(" ")[1][1:-1].lower()  # Gets the string within the parenthesis
-            if actual_name in name_relations:
-                actual_name = name_relations[actual_name]
-            return actual_name
+        self.room = None    # Focused battle, the one shown in the pokemon displays
+        self.rooms = {}     # room ID -> BattleRoom of every watched battle, only used from this thread's loop
+        self.room_updates = {}  # room ID -> newest summary row (None if removed) not taken by the Tk thread yet
+        self.room_updates_lock = threading.Lock()
+        # Seconds to wait before reconnecting after the connection drops, doubled after every failed try up to the max
+        self.reconnect_delay = 1
+        self.max_reconnect_delay = 60
+        self.wake = None    # asyncio.Event set when main should stop waiting, made in run for this thread's loop
+
+        self.loop = asyncio.new_event_loop()    # Ran by this thread, other threads hand it work with self.watch
+        self.client = ShowdownClient(self.handle_event, server_url)
+
+    def watch(self, url):
+        """
+        Starts watching the battle at url (if it isn't already) and focuses it, safe to call from any thread
+        :param url: Link to a battle, anything that isn't a battle link stops watching every battle
+        :return: True if url was a battle link, else False
+        """
+        self.url = url
+        room = room_from_url(url) if url else None
+        if room is None:
+            asyncio.run_coroutine_threadsafe(self.remove_all_battles(), self.loop)
         else:
-            actual_name = name.replace(". ", "-") if ". " in name else name.replace(" ",
-                                                                                    "-") if " " in name else name
-            actual_name = actual_name.lower()
-            return name_relations[actual_name] if actual_name in name_relations else actual_name
+            asyncio.run_coroutine_threadsafe(self.add_battle(room, focus=True), self.loop)
+        return room is not None
 
-    def run(self):
-        while True:
-            if self.do_stop:
-                return
+    def focus(self, room):
+        """
+        Shows an already watched battle in the pokemon displays, safe to call from any thread
+        :param room: Room ID
+        :return: None
+        """
+        self.loop.call_soon_threadsafe(self.set_focus, room)
+
+    def remove(self, room):
+        """
+        Stops watching a battle, safe to call from any thread
+        :param room: Room ID
+        :return: None
+        """
+        asyncio.run_coroutine_threadsafe(self.remove_battle(room), self.loop)
+
+    async def add_battle(self, room, focus=False):
+        """
+        Joins a battle room if it isn't already watched
+        :param room: Room ID
+        :param focus: Whether to show the battle in the pokemon displays
+        :return: None
+        """
+        if room not in self.rooms:
+            self.rooms[room] = BattleRoom(room)
+            self.room_updated(self.rooms[room])
+            await self.client.join(room)
+            self.wake.set()     # Connects if there were no live battles to follow before
+        if focus:
+            self.set_focus(room)
+
+    async def remove_battle(self, room):
+        """
+        Leaves a battle room
+        :param room: Room ID
+        :return: None
+        """
+        if room in self.rooms:
+            del self.rooms[room]
+            with self.room_updates_lock:
+                self.room_updates[room] = None
+            self.pokeapp.switch_events.wake()
+            await self.client.leave(room)
+        if room == self.room:
+            self.room = None
+            self.pokeapp.switch_events.publish_layout(SINGLES_SLOTS)
+            for slot in SINGLES_SLOTS:
+                self.pokeapp.switch_events.publish_status(slot, "")
+        await self.disconnect_if_done()
 
-            if self.update_url:
+    async def battle_ended(self, room):
+        """
+        Leaves the room of a finished battle, which stays in self.rooms so it can still be focused and listed
+        :param room: Room ID
+        :return: None
+        """
+        await self.client.leave(room)
+        await self.disconnect_if_done()
+
+    def has_live_battles(self):
+        """
+        :return: True if any watched battle hasn't ended
+        """
+        return any(not battle.ended for battle in self.rooms.values())
+
+    async def disconnect_if_done(self):
+        """
+        Closes the connection once no watched battle is still going, main waits for a new battle to reconnect
+        :return: None
+        """
+        if not self.has_live_battles():
+            await self.client.close()
+
+    async def remove_all_battles(self):
+        """
+        Leaves every battle room
+        :return: None
+        """
+        for room in list(self.rooms):
+            await self.remove_battle(room)
+
+    def set_focus(self, room):
+        """
+        Makes a watched battle the one shown in the pokemon displays and shows its current pokemon
+        :param room: Room ID
+        :return: None
+        """
+        if room not in self.rooms:
+            return
+        self.room = room
+        battle = self.rooms[room]
+        self.pokeapp.switch_events.publish_layout(battle.slots())
+        for slot, (pokemon, species) in battle.active.items():
+            if pokemon is not None:
+                self.pokeapp.switch_events.publish(slot, pokemon)
+        self.publish_statuses(battle)
+
+    def publish_statuses(self, battle):
+        """
+        Publishes the HP, status, and boosts of every active pokemon in a battle for the displays
+        :param battle: BattleRoom
+        :return: None
+        """
+        for slot in battle.slots():
+            pokemon = battle.state.active(*slot)
+            if pokemon is None:
+                self.pokeapp.switch_events.publish_status(slot, "")
+            else:
+                self.pokeapp.switch_events.publish_status(slot, pokemon.describe(),
+                                                          pokemon.boosts[BOOST_INDEX["spe"]])
+
+    def room_updated(self, battle):
+        """
+        Queues a battle's new summary row for the Tk thread
+        :param battle: BattleRoom that changed
+        :return: None
+        """
+        with self.room_updates_lock:
+            self.room_updates[battle.room] = battle.summary_row()
+        self.pokeapp.switch_events.wake()
+
+    def take_room_updates(self):
+        """
+        Takes the summary rows of the battles that changed since the last call, called from the Tk thread
+        :return: Dict of room ID -> summary row, or None for battles no longer watched
+        """
+        with self.room_updates_lock:
+            updates = self.room_updates
+            self.room_updates = {}
+        return updates
+
+    def handle_event(self, room, event):
+        """
+        Called by self.client for each event in a joined room
+        :param room: Room ID the event is from
+        :param event: Event from ShowdownProtocol.parse_line
+        :return: None
+        """
+        battle = self.rooms.get(room)
+        if battle is None:
+            return
+        if battle.state.apply(event) and room == self.room and self.pokeapp.showdown_mode:
+            self.publish_statuses(battle)
+
+        if isinstance(event, Player):
+            if event.side == "p1":
+                battle.player_one = event.name
+            elif event.side == "p2":
+                battle.player_two = event.name
+
+        # Switches in the focused battle are published for the Tk thread to show, only the last one per display is
+        # fetched. Each (side, position) gets its own display, so doubles and multi battles add displays as their
+        # pokemon are first sent out. Species the name index doesn't know are only shown in the summary, never looked up
+        elif isinstance(event, Switch):
+            slot = (event.side, event.position)
+            pokemon = self.pokeapp.name_index.resolve(event.species)
+            new_slot = slot not in battle.active
+            battle.active[slot] = (pokemon, event.species)
+            if room == self.room and self.pokeapp.showdown_mode:
+                if new_slot:
+                    self.pokeapp.switch_events.publish_layout(battle.slots())
+                if pokemon is not None:
+                    self.pokeapp.switch_events.publish(slot, pokemon)
+
+        # Both teams are known from Team Preview before anything is sent out, so they're looked up ahead of time and
+        # every switch in is only cache hits
+        elif isinstance(event, TeamPreviewPokemon):
+            if battle.preview_started is None:
+                battle.preview_started = time.perf_counter()
+            pokemon = self.pokeapp.name_index.resolve(event.species)
+            if pokemon is not None and pokemon not in battle.team_preview:   # Rejoining sends the log again
+                battle.team_preview.append(pokemon)
+            return
+        elif isinstance(event, TeamPreview):
+            if battle.team_preview and battle.preview_warm_time is None:
+                self.pokeapp.lookups.prefetch(battle.team_preview, battle.preview_started,
+                                              lambda seconds: setattr(battle, "preview_warm_time", seconds))
+            return
+
+        elif isinstance(event, BattleEnd):
+            if not battle.ended:    # Nothing more will happen, so nothing more is read from the battle
+                self.loop.create_task(self.battle_ended(room))
+            battle.ended = True
+            battle.winner = event.winner
+
+        else:
+            return
+        self.room_updated(battle)
+
+    async def main(self):
+        """
+        Keeps a connection to the server open while any watched battle is going, until self.stop is called. Events
+        are handled as the server pushes them, and nothing runs while there's no live battle
+        :return: None
+        """
+        delay = self.reconnect_delay
+        while not self.stop_event.is_set():
+            if not self.has_live_battles():
+                self.wake.clear()
+                await self.wake.wait()  # Until a battle is watched or self.stop is called
+                continue
+
+            try:
+                await self.client.connect()
+                delay = self.reconnect_delay
+                for battle in self.rooms.values():
+                    battle.state = BattleState(record=False)    # Rejoining sends each room's log again
+                await self.client.listen()
+            except (OSError, websockets.exceptions.WebSocketException):
+                pass
+
+            if not self.stop_event.is_set() and self.has_live_battles():
+                # The connection dropped, tries again after a delay that grows while the server can't be reached
+                self.wake.clear()
                 try:
-                    self.browser.get(self.url)
-                    time.sleep(3)
-                except selenium.common.exceptions.InvalidArgumentException:
+                    await asyncio.wait_for(self.wake.wait(), delay)
+                except asyncio.TimeoutError:
                     pass
-                self.update_url = False
-
-            time.sleep(2)
-            if self.pokeapp.showdown_mode and self.url != "":
-                chat = self.browser.find_elements_by_class_name("battle-history")
-                new_chat = [item for item in chat if item not in self.previous_chat]
-                self.previous_chat = chat
-
-                if self.player_one == self.player_two == "":
-                    for line in new_chat:
-                        line_list = line.text.split(" ")
-                        if line_list[0] == "Battle" and line_list[1] == "started":
-                            self.player_one = line_list[3]
-                            self.player_two = line_list[5][:-1]
-
-                for line in new_chat:
-                    line_list = line.text.split(" ")
-                    if line_list[0] == "Go!":
-                        self.player_one_pokemon = self.process_name(line_list[1][:-1] if len(line_list) == 2 else
-                                                                    " ".join(line_list[1:])[:-1])
-                        display = self.pokeapp.pokemon_display_parts[1]
-                        if display.current_pokemon != self.player_one_pokemon:
-                            display.change_pokemon(self.player_one_pokemon)
-
-                    elif line_list[:3] == [self.player_two, "sent", "out"]:
-                        self.player_two_pokemon = self.process_name(line_list[3][:-1] if len(line_list) == 4 else
-                                                                    " ".join(line_list[3:])[:-1])
-                        display = self.pokeapp.pokemon_display_parts[2]
-                        if display.current_pokemon != self.player_two_pokemon:
-                            display.change_pokemon(self.player_two_pokemon)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.wake = asyncio.Event()
+        try:
+            self.loop.run_until_complete(self.main())
+        except asyncio.CancelledError:
+            pass
+
+    def stop(self):
+        """
+        Closes the connection and ends the thread, safe to call from any thread
+        :return: None
+        """
+        self.stop_event.set()
 
+        async def close():
+            self.wake.set()
+            await self.client.close()
+            for task in asyncio.all_tasks():
+                if task is not asyncio.current_task():
+                    task.cancel()
 
+        if self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(close(), self.loop)
@@ -0,0 +1,175 @@
+import re
+import unicodedata
+from collections import namedtuple
+
+# Events parse_line turns protocol lines into. side is "p1" / "p2", position is the active slot letter ("a" in
+# singles), species is the Showdown species name like "Tapu Koko" or "Arceus-Fire"
+Switch = namedtuple("Switch", "kind side position nickname species hp")     # kind is switch, drag, or replace
+TeamPreviewPokemon = namedtuple("TeamPreviewPokemon", "side species")
+TeamPreview = namedtuple("TeamPreview", "picked")   # Sent after every TeamPreviewPokemon, picked can be None
+Player = namedtuple("Player", "side name")
+BattleEnd = namedtuple("BattleEnd", "winner")   # winner is None for ties
+
+# Events that change the state of a battle, used by BattleState. Pokemon are named by side and nickname, as pokemon
+# that aren't active can be changed too. hp is the raw HP text like "45/100 par" or "0 fnt"
+HpChange = namedtuple("HpChange", "side nickname hp")    # From -damage, -heal, and -sethp
+Status = namedtuple("Status", "side nickname status")   # status is like "par", "" when cured
+Boost = namedtuple("Boost", "kind side nickname stat amount")   # kind is boost or set, unboosts are negative boosts
+ClearBoosts = namedtuple("ClearBoosts", "side nickname negative_only")  # side is None for every active pokemon
+Faint = namedtuple("Faint", "side nickname")
+Weather = namedtuple("Weather", "weather")  # weather is "" once it ends
+SideCondition = namedtuple("SideCondition", "started side condition")    # condition is like "Stealth Rock"
+Turn = namedtuple("Turn", "number")
+
+SWITCH_COMMANDS = ("switch", "drag", "replace")
+HP_COMMANDS = ("-damage", "-heal", "-sethp")
+BOOST_COMMANDS = {"-boost": 1, "-unboost": -1, "-setboost": 0}   # command -> sign of the amount, 0 for setting it
+
+_ROOM_PATTERN = re.compile(r"(battle-[a-z0-9]+-[0-9]+(?:-[a-z0-9]+)?)")
+# Where a saved replay page keeps its battle log
+_REPLAY_LOG_PATTERN = re.compile(r'<script type="text/plain" class="(?:battle-log-data|log)">(.*?)</script>', re.S)
+
+
+def to_id(text):
+    """
+    Turns a name into a Showdown ID, accents folded away and lowercase with only letters and numbers
+    :param text: Name like "Tapu Koko" or "Flabébé"
+    :return: String ID like "tapukoko" or "flabebe"
+    """
+    folded = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]", "", folded.lower())
+
+
+def room_from_url(url):
+    """
+    Gets the battle room ID from a Pokemon Showdown battle link
+    :param url: Link like https://play.pokemonshowdown.com/battle-gen8ou-1234, or just the room ID
+    :return: String room ID like battle-gen8ou-1234, None if url isn't a battle
+    """
+    match = _ROOM_PATTERN.search(url.strip().lower())
+    return match.group(1) if match is not None else None
+
+
+def split_message(message):
+    """
+    Splits a message from the Showdown server into its room and lines
+    :param message: Raw websocket message, starts with ">roomid" if it's for a room
+    :return: Tuple (room ID or "" for global messages, list of lines)
+    """
+    lines = message.split("\n")
+    if lines[0].startswith(">"):
+        return lines[0][1:], lines[1:]
+    return "", lines
+
+
+def parse_pokemon_id(pokemon_id):
+    """
+    Splits a pokemon ID from the protocol
+    :param pokemon_id: ID like "p1a: Nickname", position is left out in team preview IDs like "p1: Nickname"
+    :return: Tuple (side, position, nickname)
+    """
+    position_part, __, nickname = pokemon_id.partition(": ")
+    return position_part[:2], position_part[2:3], nickname
+
+
+def parse_hp(hp):
+    """
+    Splits the HP text of a pokemon
+    :param hp: HP like "45/100", "45/100 par", or "0 fnt"
+    :return: Tuple (int current HP, int max HP or None if fainted, status like "par" or "")
+    """
+    amount, __, status = hp.partition(" ")
+    current, __, maximum = amount.partition("/")
+    return int(current), int(maximum) if maximum else None, status
+
+
+def species_from_details(details):
+    """
+    Gets the species from pokemon details
+    :param details: Details like "Garchomp, L50, M, shiny"
+    :return: Species like "Garchomp"
+    """
+    return details.split(",")[0].strip()
+
+
+def parse_line(line):
+    """
+    Parses one line of the battle protocol
+    :param line: Line like "|switch|p1a: Chompy|Garchomp, M|100/100"
+    :return: Event namedtuple from the top of this file, None for lines that aren't one
+    """
+    if not line.startswith("|"):
+        return None
+    parts = line.split("|")
+    command = parts[1]
+
+    if command in SWITCH_COMMANDS and len(parts) >= 4:
+        side, position, nickname = parse_pokemon_id(parts[2])
+        return Switch(command, side, position, nickname, species_from_details(parts[3]),
+                      parts[4] if len(parts) > 4 else None)
+    elif command == "poke" and len(parts) >= 4:
+        return TeamPreviewPokemon(parts[2], species_from_details(parts[3]))
+    elif command == "teampreview":
+        return TeamPreview(int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else None)
+    elif command in HP_COMMANDS and len(parts) >= 4:
+        side, __, nickname = parse_pokemon_id(parts[2])
+        return HpChange(side, nickname, parts[3])
+    elif command in BOOST_COMMANDS and len(parts) >= 5 and parts[4].lstrip("-").isdigit():
+        side, __, nickname = parse_pokemon_id(parts[2])
+        sign = BOOST_COMMANDS[command]
+        return Boost("set" if sign == 0 else "boost", side, nickname, parts[3], int(parts[4]) * (sign or 1))
+    elif command in ("-clearboost", "-clearnegativeboost") and len(parts) >= 3:
+        side, __, nickname = parse_pokemon_id(parts[2])
+        return ClearBoosts(side, nickname, command == "-clearnegativeboost")
+    elif command == "-clearallboost":
+        return ClearBoosts(None, None, False)
+    elif command in ("-status", "-curestatus") and len(parts) >= 4:
+        side, __, nickname = parse_pokemon_id(parts[2])
+        return Status(side, nickname, parts[3] if command == "-status" else "")
+    elif command == "faint" and len(parts) >= 3:
+        side, __, nickname = parse_pokemon_id(parts[2])
+        return Faint(side, nickname)
+    elif command == "-weather" and len(parts) >= 3:
+        if len(parts) > 3 and parts[3] == "[upkeep]":
+            return None     # Weather going on for another turn, nothing changed
+        return Weather("" if parts[2] == "none" else parts[2])
+    elif command in ("-sidestart", "-sideend") and len(parts) >= 4:
+        condition = parts[3][len("move: "):] if parts[3].startswith("move: ") else parts[3]
+        return SideCondition(command == "-sidestart", parts[2][:2], condition)
+    elif command == "turn" and len(parts) >= 3 and parts[2].isdigit():
+        return Turn(int(parts[2]))
+    elif command == "player" and len(parts) >= 4 and parts[3] != "":
+        return Player(parts[2], parts[3])
+    elif command == "win":
+        return BattleEnd(parts[2] if len(parts) > 2 else None)
+    elif command == "tie":
+        return BattleEnd(None)
+    return None
+
+
+def read_battle_log(path):
+    """
+    Reads the protocol lines of a saved battle, either a raw .log or a replay's .html page
+    :param path: Path to the file
+    :return: List of protocol lines, empty if an .html file has no battle log in it
+    """
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        text = file.read()
+    if path.lower().endswith((".html", ".htm")):
+        match = _REPLAY_LOG_PATTERN.search(text)
+        if match is None:
+            return []
+        text = match.group(1).replace("<\\/", "</")    # Replay pages escape </script> in the log as <\/script>
+    return text.splitlines()
+
+
+def parse_log(lines):
+    """
+    Parses every line of a battle log
+    :param lines: Iterable of protocol lines
+    :return: Generator of the events from parse_line, lines that aren't events are skipped
+    """
+    for line in lines:
+        event = parse_line(line.rstrip("\r\n"))
+        if event is not None:
+            yield event
@@ -0,0 +1,143 @@
+import os
+import sys
+import tracemalloc
+from array import array
+from PokemonTypes import TYPES, TYPE_INDEX
+
+# Order of base_stats in a SpeciesRecord, named as PokeAPI names them
+STATS = ("hp", "attack", "defense", "special-attack", "special-defense", "speed")
+STAT_INDEX = {name: index for index, name in enumerate(STATS)}
+
+# Sprites under here are stored as the rest of the url ("445.png"), anything else is stored whole
+SPRITE_BASE_URL = "https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/"
+
+
+def sprite_key(url):
+    """
+    Shortens a sprite url to what's kept in a SpeciesRecord
+    :param url: Sprite url, can be None
+    :return: String key, None if url is None
+    """
+    if url is None:
+        return None
+    return sys.intern(url[len(SPRITE_BASE_URL):] if url.startswith(SPRITE_BASE_URL) else url)
+
+
+class SpeciesRecord:
+    """
+    The parts of a pokemon the displays use, kept small so every species can stay in memory. Read only once made
+    -----
+    name: string
+        - Name of the pokemon, like "garchomp"
+    pokemon_id: int
+        - PokeAPI id of the pokemon
+    type_ids: tuple
+        - One or two indexes into TypeChart.TYPES
+    base_stats: array('H')
+        - Base stats in the order of STATS
+    sprite: string
+        - Sprite key from sprite_key, None if there's no sprite
+    """
+    __slots__ = ("name", "id", "type_ids", "base_stats", "sprite")
+
+    def __init__(self, name, pokemon_id, type_ids, base_stats, sprite):
+        object.__setattr__(self, "name", sys.intern(name))
+        object.__setattr__(self, "id", pokemon_id)
+        object.__setattr__(self, "type_ids", tuple(type_ids))
+        object.__setattr__(self, "base_stats", base_stats if isinstance(base_stats, array) else array("H", base_stats))
+        object.__setattr__(self, "sprite", sprite)
+
+    def __setattr__(self, attribute, value):
+        raise AttributeError("SpeciesRecord is read only")
+
+    def __repr__(self):
+        return "SpeciesRecord({!r}, {}, {}, {}, {!r})".format(self.name, self.id, self.type_names,
+                                                              tuple(self.base_stats), self.sprite)
+
+    @property
+    def type_names(self):
+        """
+        :return: Tuple of the type names, like ("dragon", "ground")
+        """
+        return tuple(TYPES[x] for x in self.type_ids)
+
+    @property
+    def sprite_url(self):
+        """
+        :return: Full url of the sprite, None if there's no sprite
+        """
+        if self.sprite is None or "://" in self.sprite:
+            return self.sprite
+        return SPRITE_BASE_URL + self.sprite
+
+    def stat(self, name):
+        """
+        Gets one base stat by name
+        :param name: Stat name from STATS, like "speed"
+        :return: Int
+        """
+        return self.base_stats[STAT_INDEX[name]]
+
+    def with_types(self, type_names):
+        """
+        Makes a record of this pokemon with other types, for type changed forms. The stats are shared, not copied
+        :param type_names: One or two type names
+        :return: SpeciesRecord
+        """
+        return SpeciesRecord(self.name, self.id, (TYPE_INDEX[x] for x in type_names), self.base_stats, self.sprite)
+
+    @classmethod
+    def from_resource(cls, resource):
+        """
+        Makes a record from a pokepy pokemon resource, keeping only what's used
+        :param resource: Pokemon resource with .name, .id, .types, .stats, and .sprites
+        :return: SpeciesRecord, resource itself if it already is one
+        """
+        if isinstance(resource, cls):
+            return resource
+        types = sorted(resource.types, key=lambda x: x.slot)
+        stats = {x.stat.name: x.base_stat for x in resource.stats}
+        return cls(resource.name, resource.id, (TYPE_INDEX[x.type.name] for x in types),
+                   (stats[x] for x in STATS), sprite_key(resource.sprites.front_default))
+
+    @classmethod
+    def from_json(cls, resource):
+        """
+        Makes a record from a pokemon resource as PokeAPI sends it (json loaded into dicts)
+        :param resource: Dict of the pokemon resource
+        :return: SpeciesRecord
+        """
+        types = sorted(resource["types"], key=lambda x: x["slot"])
+        stats = {x["stat"]["name"]: x["base_stat"] for x in resource["stats"]}
+        return cls(resource["name"], resource["id"], (TYPE_INDEX[x["type"]["name"]] for x in types),
+                   (stats[x] for x in STATS), sprite_key(resource["sprites"]["front_default"]))
+
+
+def measure_memory(dump_dir):
+    """
+    Compares the memory held by every pokemon resource of a PokeAPI dump against the same pokemon as SpeciesRecords
+    :param dump_dir: Folder of the PokeAPI api-data dump
+    :return: Dict with the number of pokemon and the bytes held by each
+    """
+    from PokeDataStore import find_api_root, read_resources
+    folder = os.path.join(find_api_root(dump_dir), "pokemon")
+
+    tracemalloc.start()
+    resources = list(read_resources(folder))
+    resource_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    records = [SpeciesRecord.from_json(x) for x in resources]
+    record_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {"pokemon": len(records), "resource_bytes": resource_bytes, "record_bytes": record_bytes}
+
+
+if __name__ == "__main__":
+    # Usage: python SpeciesRecord.py <path to api-data dump>
+    results = measure_memory(sys.argv[1])
+    print("{pokemon} pokemon".format(**results))
+    print("Full resources: {:.1f} KB".format(results["resource_bytes"] / 1024))
+    print("SpeciesRecords: {:.1f} KB ({:.0f}x smaller)".format(
+        results["record_bytes"] / 1024, results["resource_bytes"] / max(results["record_bytes"], 1)))
@@ -0,0 +1,175 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from PIL import Image
+
+
+class SpriteCache:
+    """
+    Two tier cache for sprites. Decoded PIL images are kept in a memory LRU, and downloaded files are kept in a disk
+    cache named by the hash of their url. Both tiers have a byte budget and evict the least recently used sprites
+    -----
+    cache_dir: string
+        - Folder for the disk cache, made if it doesn't exist
+    max_memory_bytes: int
+        - Budget for decoded images in memory (width * height * bands of each image)
+    max_disk_bytes: int
+        - Budget for the files in cache_dir
+    download_timeout: float
+        - Seconds to wait on the server while downloading a sprite before giving up on it
+    """
+
+    def __init__(self, cache_dir="sprite_cache", max_memory_bytes=8 * 1024 * 1024, max_disk_bytes=32 * 1024 * 1024,
+                 download_timeout=5):
+        self.cache_dir = cache_dir
+        self.download_timeout = download_timeout
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.lock = threading.Lock()
+
+        self.images = OrderedDict()     # url -> decoded image, least recently used first
+        self.memory_bytes = 0
+
+        # Counters, can be checked with self.stats()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.disk_files = OrderedDict()     # file name -> size in bytes, least recently used first
+        entries = [x for x in os.scandir(self.cache_dir) if x.is_file() and x.name.endswith(".png")]
+        for entry in sorted(entries, key=lambda x: x.stat().st_mtime):
+            self.disk_files[entry.name] = entry.stat().st_size
+        self.disk_bytes = sum(self.disk_files.values())
+
+    @staticmethod
+    def url_key(url):
+        """
+        Gets the file name a url is stored as in the disk cache
+        :param url: Sprite url
+        :return: String file name
+        """
+        return hashlib.sha1(url.encode("utf-8")).hexdigest() + ".png"
+
+    @staticmethod
+    def image_size(image):
+        """
+        Gets roughly how many bytes a decoded image takes in memory
+        :param image: PIL image
+        :return: Int bytes
+        """
+        return image.width * image.height * len(image.getbands())
+
+    def get_image(self, url):
+        """
+        Gets the decoded sprite at url, from memory, then disk, then the network
+        :param url: Sprite url, can be None for pokemon with no sprite
+        :return: PIL image, None if url is None
+        """
+        if url is None:
+            return None
+
+        with self.lock:
+            if url in self.images:
+                self.images.move_to_end(url)
+                self.memory_hits += 1
+                return self.images[url]
+
+        file_name = self.url_key(url)
+        path = os.path.join(self.cache_dir, file_name)
+        data = None
+        with self.lock:
+            on_disk = file_name in self.disk_files
+        if on_disk:
+            try:
+                with open(path, "rb") as file:
+                    data = file.read()
+                os.utime(path)
+                with self.lock:
+                    self.disk_files.move_to_end(file_name)
+                    self.disk_hits += 1
+            except OSError:
+                with self.lock:     # File was removed from outside the cache, so it's treated as a miss
+                    self.disk_bytes -= self.disk_files.pop(file_name, 0)
+
+        if data is None:
+            import requests     # Only loaded once a sprite has to be downloaded
+            response = requests.get(url, timeout=self.download_timeout)   # A stalled server can't hold a thread
+            response.raise_for_status()
+            data = response.content
+            self.store_file(file_name, data)
+            with self.lock:
+                self.misses += 1
+
+        image = Image.open(BytesIO(data))
+        image.load()    # Decodes now so the cached image never reads from the buffer again
+        self.store_image(url, image)
+        return image
+
+    def store_image(self, url, image):
+        """
+        Adds a decoded image to the memory tier, evicting the least recently used ones past the budget
+        :param url: Sprite url
+        :param image: Decoded PIL image
+        :return: None
+        """
+        with self.lock:
+            if url in self.images:
+                self.memory_bytes -= self.image_size(self.images.pop(url))
+            self.images[url] = image
+            self.memory_bytes += self.image_size(image)
+            while self.memory_bytes > self.max_memory_bytes and len(self.images) > 1:
+                __, evicted = self.images.popitem(last=False)
+                self.memory_bytes -= self.image_size(evicted)
+                self.evictions += 1
+
+    def store_file(self, file_name, data):
+        """
+        Writes a downloaded sprite to the disk tier, evicting the least recently used files past the budget
+        :param file_name: Name from self.url_key
+        :param data: Bytes of the sprite file
+        :return: None
+        """
+        path = os.path.join(self.cache_dir, file_name)
+        temp_path = "{}.{}.tmp".format(path, threading.get_ident())
+        with open(temp_path, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
+
+        with self.lock:
+            self.disk_bytes -= self.disk_files.pop(file_name, 0)
+            self.disk_files[file_name] = len(data)
+            self.disk_bytes += len(data)
+            evicted = []
+            while self.disk_bytes > self.max_disk_bytes and len(self.disk_files) > 1:
+                evicted_name, evicted_size = self.disk_files.popitem(last=False)
+                self.disk_bytes -= evicted_size
+                evicted.append(evicted_name)
+
+        for evicted_name in evicted:
+            try:
+                os.remove(os.path.join(self.cache_dir, evicted_name))
+            except OSError:
+                pass
+
+    def stats(self):
+        """
+        Gets the cache counters
+        :return: Dict of hit / miss counts and current sizes of both tiers
+        """
+        with self.lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_images": len(self.images),
+                "memory_bytes": self.memory_bytes,
+                "disk_files": len(self.disk_files),
+                "disk_bytes": self.disk_bytes,
+            }
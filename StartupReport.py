@@ -0,0 +1,97 @@
+import importlib.abc
+import sys
+import time
+
+START_TIME = time.perf_counter()    # As close to launch as can be measured, this is imported first by PokeApp
+ENABLED = "--startup-report" in sys.argv
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """
+    Times how long every module takes to import, like python -X importtime. Each module gets its own time (without
+    the modules it imported) and its cumulative time
+    -----
+    timings: list
+        - (name, own seconds, cumulative seconds, depth) of each import, in the order they finished
+    """
+
+    def __init__(self):
+        self.timings = []
+        self.stack = []     # [seconds spent importing children] for each import in progress
+        self.finding = set()    # Names being looked up, so this finder doesn't find itself
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname in self.finding:
+            return None
+        self.finding.add(fullname)
+        try:
+            spec = None
+            for finder in sys.meta_path:
+                if finder is not self and hasattr(finder, "find_spec"):
+                    spec = finder.find_spec(fullname, path, target)
+                    if spec is not None:
+                        break
+        finally:
+            self.finding.discard(fullname)
+        # Builtin and frozen modules are loaded by a class shared by all of them, so only file loaders are timed
+        if spec is None or spec.loader is None or isinstance(spec.loader, type) or \
+                not hasattr(spec.loader, "exec_module"):
+            return spec
+
+        loader = spec.loader
+        exec_module = loader.exec_module
+
+        def timed_exec_module(module):
+            self.stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                cumulative = time.perf_counter() - start
+                children = self.stack.pop()
+                if self.stack:
+                    self.stack[-1] += cumulative
+                self.timings.append((fullname, cumulative - children, cumulative, len(self.stack)))
+
+        loader.exec_module = timed_exec_module
+        return spec
+
+    def slowest(self, count=15):
+        """
+        Gets the imports that took the longest, counting the modules they imported
+        :param count: Number of imports to get
+        :return: List of (name, own seconds, cumulative seconds, depth), slowest first
+        """
+        return sorted(self.timings, key=lambda x: x[2], reverse=True)[:count]
+
+
+import_timer = ImportTimer()
+if ENABLED:
+    sys.meta_path.insert(0, import_timer)
+
+
+def report_when_shown(root, output=sys.stderr):
+    """
+    Prints the time from launch until the window was first shown, and the slowest imports before then. Only does
+    anything when ran with --startup-report
+    :param root: tk.Tk() of the window
+    :param output: Writable text file to print to
+    :return: None
+    """
+    if not ENABLED:
+        return
+
+    def report(event=None):
+        if event is not None and event.widget is not root:
+            return  # <Map> also fires for every child widget
+        root.unbind("<Map>")
+        shown = time.perf_counter() - START_TIME
+        sys.meta_path.remove(import_timer)
+        print("Window shown {:.0f} ms after launch, {} modules imported in {:.0f} ms".format(
+            shown * 1000, len(import_timer.timings), sum(x[1] for x in import_timer.timings) * 1000), file=output)
+        print("{:>10} | {:>10} | module".format("self (ms)", "cumul (ms)"), file=output)
+        for name, own, cumulative, depth in import_timer.slowest():
+            print("{:>10.1f} | {:>10.1f} | {}{}".format(own * 1000, cumulative * 1000, "  " * depth, name),
+                  file=output)
+
+    root.bind("<Map>", report)
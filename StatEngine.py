@@ -0,0 +1,207 @@
+import sys
+import time
+from collections import namedtuple
+import numpy as np
+from SpeciesRecord import STATS, STAT_INDEX
+
+# Stat spreads each stat is worked out for, from slowest to fastest. Together they're the range a stat can be in:
+# "min" is 0 IVs, 0 EVs, and a hindering nature, "max" 31 IVs, 252 EVs, and a boosting nature. Natures are in tenths
+# so the rounding matches the games
+SPREAD_NAMES = ("min", "neutral", "invested", "max")
+SPREAD_INDEX = {name: index for index, name in enumerate(SPREAD_NAMES)}
+SPREAD_IVS = np.array((0, 31, 31, 31), dtype=np.int32)
+SPREAD_EVS = np.array((0, 0, 252, 252), dtype=np.int32)
+SPREAD_NATURES = np.array((9, 10, 10, 11), dtype=np.int32)
+
+# Boost stages from -6 to 6, a stage multiplies a stat by BOOST_NUMERATORS / BOOST_DENOMINATORS
+BOOST_STAGES = np.arange(-6, 7, dtype=np.int32)
+BOOST_NUMERATORS = np.maximum(2, 2 + BOOST_STAGES)
+BOOST_DENOMINATORS = np.maximum(2, 2 - BOOST_STAGES)
+
+SPEED = STAT_INDEX["speed"]
+
+# How one pokemon's speed compares to another's. speed is its speed with the spread asked for, opponent_min and
+# opponent_max the range the opponent's speed can be in, and certain whether every spread of both agrees
+SpeedMatchup = namedtuple("SpeedMatchup", "speed opponent_min opponent_max verdict certain")
+
+
+def final_stats(base_stats, level=100):
+    """
+    Works out every stat of every species for each spread in SPREAD_NAMES, all in one batch
+    :param base_stats: Int array of shape (species, 6), base stats in the order of SpeciesRecord.STATS
+    :param level: Level of the pokemon, 1-100
+    :return: Int array of shape (species, 6, spreads)
+    """
+    base = np.asarray(base_stats, dtype=np.int32)[:, :, np.newaxis]
+    core = (2 * base + SPREAD_IVS + SPREAD_EVS // 4) * level // 100
+    stats = np.empty_like(core)
+    stats[:, 0] = np.where(base[:, 0] == 1, 1, core[:, 0] + level + 10)  # Shedinja always has 1 HP
+    stats[:, 1:] = (core[:, 1:] + 5) * SPREAD_NATURES // 10
+    return stats
+
+
+def boosted(stats):
+    """
+    Applies every boost stage to some stats
+    :param stats: Int array of stats
+    :return: Int array with one more axis at the end, one entry for each of BOOST_STAGES
+    """
+    return stats[..., np.newaxis] * BOOST_NUMERATORS // BOOST_DENOMINATORS
+
+
+class StatEngine:
+    """
+    Final stats of every species at a level, over the stat spreads in SPREAD_NAMES. Speed is also worked out at every
+    boost stage, so speed tier questions are only lookups into the tables
+    -----
+    names: list
+        - Name of each species, like "garchomp"
+    base_stats: array
+        - Base stats of each species, shape (species, 6) in the order of SpeciesRecord.STATS
+    level: int
+        - Level the stats are for
+    """
+
+    def __init__(self, names, base_stats, level=100):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.base_stats = np.asarray(base_stats, dtype=np.int32).reshape(len(self.names), len(STATS))
+        self.level = None
+        self.stats = None   # Shape (species, 6, spreads)
+        self.speeds = None  # Shape (species, spreads, boost stages)
+        self.set_level(level)
+
+    @classmethod
+    def from_records(cls, records, level=100):
+        """
+        Makes an engine for some species
+        :param records: Iterable of SpeciesRecords
+        :param level: Level the stats are for
+        :return: StatEngine
+        """
+        records = list(records)
+        return cls([x.name for x in records], [x.base_stats for x in records], level)
+
+    @classmethod
+    def from_store(cls, poke_client, level=100):
+        """
+        Makes an engine for every species in the local data store
+        :param poke_client: PokeDataStore.LocalPokeClient
+        :param level: Level the stats are for
+        :return: StatEngine
+        """
+        rows = poke_client.all_base_stats()
+        return cls([x[0] for x in rows], [x[1] for x in rows], level)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __len__(self):
+        return len(self.names)
+
+    def set_level(self, level):
+        """
+        Works out the tables again for another level
+        :param level: Level, 1-100
+        :return: None
+        """
+        self.level = level
+        self.stats = final_stats(self.base_stats, level)
+        self.speeds = boosted(self.stats[:, SPEED])
+
+    def stat_range(self, name, stat="speed", stage=0):
+        """
+        Gets the lowest and highest a stat of a species can be
+        :param name: Species name
+        :param stat: Stat name from SpeciesRecord.STATS
+        :param stage: Boost stage, -6 to 6, not used for HP
+        :return: Tuple of ints (min, max)
+        """
+        values = self.stats[self.index[name], STAT_INDEX[stat]]
+        if stat != "hp":
+            values = boosted(values)[:, stage + 6]
+        return int(values[0]), int(values[-1])
+
+    def speed(self, name, spread="max", stage=0):
+        """
+        Gets the speed of a species with one spread
+        :param name: Species name
+        :param spread: Spread from SPREAD_NAMES
+        :param stage: Boost stage, -6 to 6
+        :return: Int
+        """
+        return int(self.speeds[self.index[name], SPREAD_INDEX[spread], stage + 6])
+
+    def compare_speed(self, name, opponent, stage=0, opponent_stage=0, spread="max"):
+        """
+        Works out whether a species outspeeds an opponent. Both are compared with the same spread, and if no spreads
+        overlap the result is certain
+        :param name: Species name
+        :param opponent: Opposing species name
+        :param stage: Speed boost stage of the species
+        :param opponent_stage: Speed boost stage of the opponent
+        :param spread: Spread from SPREAD_NAMES both are compared with
+        :return: SpeedMatchup, verdict is 1 if it's faster, -1 if slower, and 0 for a speed tie
+        """
+        speeds = self.speeds[self.index[name], :, stage + 6]
+        opponent_speeds = self.speeds[self.index[opponent], :, opponent_stage + 6]
+        spread = SPREAD_INDEX[spread]
+        verdict = int(np.sign(speeds[spread] - opponent_speeds[spread]))
+        certain = bool(speeds[0] > opponent_speeds[-1] or speeds[-1] < opponent_speeds[0])
+        return SpeedMatchup(int(speeds[spread]), int(opponent_speeds[0]), int(opponent_speeds[-1]), verdict, certain)
+
+    def count_faster(self, speed, stage=0, spread="max"):
+        """
+        Counts the species that would outspeed a speed, like for where a pokemon is in the speed tiers
+        :param speed: Int speed to beat
+        :param stage: Boost stage of every other species
+        :param spread: Spread from SPREAD_NAMES every other species has
+        :return: Int number of species
+        """
+        return int(np.count_nonzero(self.speeds[:, SPREAD_INDEX[spread], stage + 6] > speed))
+
+    def describe_speed(self, name, opponents=(), stage=0):
+        """
+        Gets a short line of a species' speed and how it compares to some opponents, for the displays
+        :param name: Species name
+        :param opponents: Iterable of (opposing species name, its speed boost stage)
+        :param stage: Speed boost stage of the species
+        :return: String like "Spe 229-328, faster than Zapdos"
+        """
+        parts = ["Spe {}-{}".format(*self.stat_range(name, "speed", stage))]
+        for opponent, opponent_stage in opponents:
+            if opponent not in self.index:
+                continue
+            matchup = self.compare_speed(name, opponent, stage, opponent_stage)
+            verdict = {1: "faster than", -1: "slower than", 0: "ties"}[matchup.verdict]
+            parts.append("{}{} {}".format("always " if matchup.certain else "", verdict, opponent.capitalize()))
+        return ", ".join(parts)
+
+
+def benchmark_table(names, base_stats, repeat=50):
+    """
+    Times working out the whole stat and speed tier table
+    :param names: Name of each species
+    :param base_stats: Base stats of each species, shape (species, 6)
+    :param repeat: Number of times to build it
+    :return: Dict of the number of species and mean milliseconds per build
+    """
+    engine = StatEngine(names, base_stats)
+    start = time.perf_counter()
+    for level in range(repeat):
+        engine.set_level(100 - level % 50)
+    return {"species": len(engine), "build_ms": (time.perf_counter() - start) / repeat * 1000}
+
+
+if __name__ == "__main__":
+    # Usage: python StatEngine.py [path to data store]
+    # Times building the table for every species in the store and prints a few speeds
+    from PokeDataStore import LocalPokeClient, DEFAULT_STORE_PATH
+    client = LocalPokeClient(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_STORE_PATH)
+    rows = client.all_base_stats()
+    timing = benchmark_table([x[0] for x in rows], [x[1] for x in rows])
+    print("{species} species, table built in {build_ms:.2f} ms".format(**timing))
+    store_engine = StatEngine.from_store(client)
+    for species in store_engine.names[:5]:
+        print(species, store_engine.describe_speed(species))
+    client.close()
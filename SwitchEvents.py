@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import namedtuple
+
+# A pokemon being switched in, published by ShowdownListener. slot is the display it's shown on and created is the
+# time.perf_counter() it was published at
+SwitchEvent = namedtuple("SwitchEvent", "slot pokemon created")
+
+# Displays are keyed by the (side, position) of the pokemon they show, like ("p2", "b"). Singles battles only use
+# these two, doubles and multi battles add more as their pokemon are sent out
+SINGLES_SLOTS = (("p1", "a"), ("p2", "a"))
+
+
+class SwitchEventQueue:
+    """
+    Thread safe queue of switch events from ShowdownListener to the Tk thread. Events are coalesced per display
+    slot, so if several switches for a slot are published before the Tk thread takes them, only the last one is kept
+    and only that pokemon is fetched and rendered. on_wake is called once when something is published while the Tk
+    thread has nothing waiting, so it can drain right away instead of on its next poll
+    -----
+    on_wake: function
+        - Called with no arguments from the publishing thread, None to only poll
+    """
+
+    def __init__(self, on_wake=None):
+        self.lock = threading.Lock()
+        self.on_wake = on_wake
+        self.woken = False  # Whether on_wake was called since the Tk thread last called self.clear_wake
+        self.pending = {}   # slot -> newest SwitchEvent not taken yet
+        self.statuses = {}  # slot -> newest (status line, speed boost stage) from BattleState not taken yet
+        self.layout = None  # Newest tuple of slots the focused battle uses not taken yet, None if it hasn't changed
+
+        # Counters, can be checked with self.stats()
+        self.published = 0
+        self.coalesced = 0      # Events replaced by a newer one for the same slot before being taken
+        self.rendered = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = 0.0
+
+    def publish(self, slot, pokemon):
+        """
+        Adds a switch event, replacing any event for the slot that hasn't been taken yet. Safe from any thread
+        :param slot: (side, position) of the display the pokemon is shown on
+        :param pokemon: Name of the pokemon switched in
+        :return: None
+        """
+        with self.lock:
+            if slot in self.pending:
+                self.coalesced += 1
+            self.pending[slot] = SwitchEvent(slot, pokemon, time.perf_counter())
+            self.published += 1
+        self.wake()
+
+    def wake(self):
+        """
+        Calls on_wake unless it was already called and the Tk thread hasn't drained since. Safe from any thread
+        :return: None
+        """
+        with self.lock:
+            if self.woken or self.on_wake is None:
+                return
+            self.woken = True
+        self.on_wake()
+
+    def clear_wake(self):
+        """
+        Lets the next publish call on_wake again, called from the Tk thread before it takes what's pending
+        :return: None
+        """
+        with self.lock:
+            self.woken = False
+
+    def take_all(self):
+        """
+        Takes every pending event, called from the Tk thread
+        :return: List of SwitchEvents, at most one per slot
+        """
+        with self.lock:
+            events = list(self.pending.values())
+            self.pending = {}
+        return events
+
+    def publish_status(self, slot, status, speed_stage=0):
+        """
+        Sets the HP, status, and boosts line shown on a display, replacing any line for the slot not taken yet. Safe
+        from any thread
+        :param slot: (side, position) of the display
+        :param status: Line from BattleState.PokemonState.describe, empty to clear it
+        :param speed_stage: Speed boost stage of the pokemon, used for its speed tier
+        :return: None
+        """
+        with self.lock:
+            self.statuses[slot] = (status, speed_stage)
+        self.wake()
+
+    def take_statuses(self):
+        """
+        Takes every pending status line, called from the Tk thread
+        :return: Dict of slot -> (status line, speed boost stage)
+        """
+        with self.lock:
+            statuses = self.statuses
+            self.statuses = {}
+        return statuses
+
+    def publish_layout(self, slots):
+        """
+        Sets which displays the focused battle uses, replacing any layout not taken yet. Safe from any thread
+        :param slots: Tuple of (side, position) slots, in the order they're laid out
+        :return: None
+        """
+        with self.lock:
+            self.layout = tuple(slots)
+        self.wake()
+
+    def take_layout(self):
+        """
+        Takes the newest layout, called from the Tk thread
+        :return: Tuple of slots, None if there's no new layout
+        """
+        with self.lock:
+            layout = self.layout
+            self.layout = None
+        return layout
+
+    def depth(self):
+        """
+        Gets how many events are waiting to be taken
+        :return: Int
+        """
+        with self.lock:
+            return len(self.pending)
+
+    def record_render(self, event):
+        """
+        Records that an event's pokemon was shown, used for the event to render latency
+        :param event: SwitchEvent that was rendered
+        :return: Float seconds from the event being published to it being rendered
+        """
+        latency = time.perf_counter() - event.created
+        with self.lock:
+            self.rendered += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self.last_latency = latency
+        return latency
+
+    def stats(self):
+        """
+        Gets the queue counters
+        :return: Dict of the queue depth, event counts, and event to render latencies in seconds
+        """
+        with self.lock:
+            return {
+                "depth": len(self.pending),
+                "published": self.published,
+                "coalesced": self.coalesced,
+                "rendered": self.rendered,
+                "last_latency": self.last_latency,
+                "mean_latency": self.total_latency / self.rendered if self.rendered else 0.0,
+                "max_latency": self.max_latency,
+            }
@@ -0,0 +1,75 @@
+import tkinter as tk
+import weakref
+
+# Colors of each theme. bg is the regular background, fg the text color (also used as a light background), and
+# dark_bg the background of buttons
+THEMES = {
+    "dark": {"bg": "#3C3F41", "fg": "#A9B7C6", "dark_bg": "#1a1b1c"},
+    "light": {"bg": "white", "fg": "black", "dark_bg": "black"},
+}
+
+# Role a widget is tagged with -> (option it sets, theme color it takes)
+ROLES = {
+    "bg": ("bg", "bg"),
+    "fg": ("fg", "fg"),
+    "dark_bg": ("bg", "dark_bg"),
+    "light_bg": ("bg", "fg"),
+}
+
+
+class ThemeRegistry:
+    """
+    Keeps track of which widgets take which theme colors, without keeping the widgets alive. Widgets are tagged with
+    roles when made and forgotten once they're garbage collected, so the registry only ever holds live widgets
+    -----
+    theme: string
+        - Name of the starting theme in THEMES
+    """
+
+    def __init__(self, theme="dark"):
+        self.theme = theme
+        self.widgets = weakref.WeakKeyDictionary()  # widget -> tuple of roles
+
+    @property
+    def colors(self):
+        """
+        :return: Dict of the current theme's colors
+        """
+        return THEMES[self.theme]
+
+    def register(self, widget, *roles):
+        """
+        Tags a widget with theme roles, adding to any it already has
+        :param widget: Tk widget
+        :param roles: Roles from ROLES, like "bg" and "fg"
+        :return: widget, so it can be made and registered in one line
+        """
+        self.widgets[widget] = tuple(dict.fromkeys(self.widgets.get(widget, ()) + roles))
+        return widget
+
+    def unregister(self, widget):
+        """
+        Stops a widget from taking theme colors
+        :param widget: Tk widget
+        :return: None
+        """
+        self.widgets.pop(widget, None)
+
+    def __len__(self):
+        return len(self.widgets)
+
+    def apply(self, theme):
+        """
+        Switches to a theme, setting every option of a widget in one configure call. Widgets that were destroyed but
+        not collected yet are dropped
+        :param theme: Name of the theme in THEMES
+        :return: None
+        """
+        self.theme = theme
+        colors = THEMES[theme]
+        for widget, roles in list(self.widgets.items()):
+            options = {ROLES[role][0]: colors[ROLES[role][1]] for role in roles}
+            try:
+                widget.configure(**options)
+            except tk.TclError:
+                self.widgets.pop(widget, None)
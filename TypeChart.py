@@ -0,0 +1,121 @@
+import numpy as np
+from PokemonTypes import TYPES, TYPE_INDEX, NO_TYPE
+
+# Every attacking type's non-neutral matchups, anything not listed is 1x
+_SUPER_EFFECTIVE = {
+    "fire": ("grass", "ice", "bug", "steel"),
+    "water": ("fire", "ground", "rock"),
+    "electric": ("water", "flying"),
+    "grass": ("water", "ground", "rock"),
+    "ice": ("grass", "ground", "flying", "dragon"),
+    "fighting": ("normal", "ice", "rock", "dark", "steel"),
+    "poison": ("grass", "fairy"),
+    "ground": ("fire", "electric", "poison", "rock", "steel"),
+    "flying": ("grass", "fighting", "bug"),
+    "psychic": ("fighting", "poison"),
+    "bug": ("grass", "psychic", "dark"),
+    "rock": ("fire", "ice", "flying", "bug"),
+    "ghost": ("psychic", "ghost"),
+    "dragon": ("dragon",),
+    "dark": ("psychic", "ghost"),
+    "steel": ("ice", "rock", "fairy"),
+    "fairy": ("fighting", "dragon", "dark"),
+}
+_NOT_VERY_EFFECTIVE = {
+    "normal": ("rock", "steel"),
+    "fire": ("fire", "water", "rock", "dragon"),
+    "water": ("water", "grass", "dragon"),
+    "electric": ("electric", "grass", "dragon"),
+    "grass": ("fire", "grass", "poison", "flying", "bug", "dragon", "steel"),
+    "ice": ("fire", "water", "ice", "steel"),
+    "fighting": ("poison", "flying", "psychic", "bug", "fairy"),
+    "poison": ("poison", "ground", "rock", "ghost"),
+    "ground": ("grass", "bug"),
+    "flying": ("electric", "rock", "steel"),
+    "psychic": ("psychic", "steel"),
+    "bug": ("fire", "fighting", "poison", "flying", "ghost", "steel", "fairy"),
+    "rock": ("fighting", "ground", "steel"),
+    "ghost": ("dark",),
+    "dragon": ("steel",),
+    "dark": ("fighting", "dark", "fairy"),
+    "steel": ("fire", "water", "electric", "steel"),
+    "fairy": ("fire", "poison", "steel"),
+}
+_NO_EFFECT = {
+    "normal": ("ghost",),
+    "electric": ("ground",),
+    "fighting": ("ghost",),
+    "poison": ("steel",),
+    "ground": ("flying",),
+    "psychic": ("dark",),
+    "ghost": ("normal",),
+    "dragon": ("fairy",),
+}
+
+
+def build_type_chart():
+    """
+    Builds the 18x18 type chart
+    :return: numpy array where chart[attacking type index, defending type index] is the damage multiplier
+    """
+    chart = np.ones((len(TYPES), len(TYPES)), dtype=np.float32)
+    for multiplier, relations in ((2.0, _SUPER_EFFECTIVE), (0.5, _NOT_VERY_EFFECTIVE), (0.0, _NO_EFFECT)):
+        for attacking, defending_types in relations.items():
+            for defending in defending_types:
+                chart[TYPE_INDEX[attacking], TYPE_INDEX[defending]] = multiplier
+    return chart
+
+
+def build_defensive_table(chart):
+    """
+    Precomputes the multiplier of every attacking type against every type pair
+    :param chart: Chart from build_type_chart
+    :return: numpy array where table[type one, type two] is the 18 long vector of multipliers taken by that pair,
+             type two is NO_TYPE for single type pokemon
+    """
+    columns = np.ones((len(TYPES), len(TYPES) + 1), dtype=np.float32)
+    columns[:, :len(TYPES)] = chart
+    table = columns.T[:, np.newaxis, :] * columns.T[np.newaxis, :, :]
+    table.flags.writeable = False
+    return table
+
+
+TYPE_CHART = build_type_chart()
+TYPE_CHART.flags.writeable = False
+DEFENSIVE_TABLE = build_defensive_table(TYPE_CHART)
+
+
+def defensive_multipliers(types):
+    """
+    Gets the multiplier every attacking type does to a pokemon with the given types
+    :param types: Iterable of one or two type names
+    :return: Read only numpy vector of 18 multipliers, in the order of TYPES
+    """
+    indexes = [TYPE_INDEX[name] for name in types]
+    return DEFENSIVE_TABLE[indexes[0], indexes[1] if len(indexes) > 1 else NO_TYPE]
+
+
+def multiplier(attacking, types):
+    """
+    Gets the exact multiplier an attacking type does to a pokemon with the given types
+    :param attacking: Attacking type name
+    :param types: Iterable of one or two defending type names
+    :return: Float multiplier, one of 4, 2, 1, 0.5, 0.25, or 0
+    """
+    return float(defensive_multipliers(types)[TYPE_INDEX[attacking]])
+
+
+def type_matchups(types):
+    """
+    Sorts every attacking type into the groups shown by PokemonDisplay
+    :param types: Iterable of one or two defending type names
+    :return: Dict of alphabetical lists, "weaknesses" and "resistances" include the quad ones
+    """
+    vector = defensive_multipliers(types)
+    return {
+        "weaknesses": sorted(TYPES[i] for i in np.flatnonzero(vector > 1)),
+        "quad_weaknesses": sorted(TYPES[i] for i in np.flatnonzero(vector > 2)),
+        "resistances": sorted(TYPES[i] for i in np.flatnonzero((vector < 1) & (vector > 0))),
+        "quad_resistances": sorted(TYPES[i] for i in np.flatnonzero((vector < 0.5) & (vector > 0))),
+        "immunities": sorted(TYPES[i] for i in np.flatnonzero(vector == 0)),
+    }
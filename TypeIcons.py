@@ -0,0 +1,66 @@
+import os
+from PIL import Image, ImageDraw, ImageTk
+from PokemonTypes import TYPES
+
+QUAD_BORDER_COLOR = (255, 106, 106)     # IndianRed1, the color quad weaknesses / resistances are highlighted with
+QUAD_BORDER_WIDTH = 3
+
+
+def make_quad_variant(image, border=QUAD_BORDER_WIDTH, color=QUAD_BORDER_COLOR):
+    """
+    Makes the highlighted version of a type icon used for quad weaknesses and resistances, drawn with a raised border
+    :param image: PIL image of the type icon
+    :param border: Border width in pixels
+    :param color: RGB color of the border
+    :return: New PIL image, border pixels bigger on every side
+    """
+    icon = image.convert("RGBA")
+    variant = Image.new("RGBA", (icon.width + 2 * border, icon.height + 2 * border), color + (255,))
+    variant.paste(icon, (border, border), icon)
+
+    light = tuple((x + 255) // 2 for x in color) + (255,)   # Lit top / left and shaded bottom / right edges
+    dark = tuple(x * 3 // 5 for x in color) + (255,)       # make the border look raised like relief='raised'
+    draw = ImageDraw.Draw(variant)
+    right = variant.width - 1
+    bottom = variant.height - 1
+    for i in range(border):
+        draw.line((i, i, right - i, i), fill=light)
+        draw.line((i, i, i, bottom - i), fill=light)
+        draw.line((i, bottom - i, right - i, bottom - i), fill=dark)
+        draw.line((right - i, i, right - i, bottom - i), fill=dark)
+    return variant
+
+
+class TypeIconAtlas:
+    """
+    Decodes every type icon (and its quad variant) and the placeholder sprites once, so displays never open image
+    files while rendering. One atlas is made by PokeApp and shared by every PokemonDisplay
+    -----
+    master: tk widget
+        - Widget whose Tk interpreter owns the images, must exist before the atlas is made
+    image_dir: string
+        - Folder with a <type>.png for every type
+    """
+
+    def __init__(self, master=None, image_dir="type_images"):
+        self.icons = {}
+        self.quad_icons = {}
+        for name in TYPES:
+            with Image.open(os.path.join(image_dir, "{}.png".format(name))) as image:
+                image.load()
+                self.icons[name] = ImageTk.PhotoImage(image, master=master)
+                self.quad_icons[name] = ImageTk.PhotoImage(make_quad_variant(image), master=master)
+
+        with Image.open("default.png") as image:
+            self.default_sprite = ImageTk.PhotoImage(image, master=master)
+        with Image.open("no_picture.png") as image:
+            self.no_picture_sprite = ImageTk.PhotoImage(image, master=master)
+
+    def icon(self, name, quad=False):
+        """
+        Gets the render of a type icon
+        :param name: Type name
+        :param quad: Whether to get the highlighted quad weakness / resistance variant
+        :return: ImageTk.PhotoImage
+        """
+        return self.quad_icons[name] if quad else self.icons[name]
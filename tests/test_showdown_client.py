@@ -0,0 +1,136 @@
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))   # The app's modules are top level
+
+from ShowdownClient import ShowdownClient, serve_replay
+from ShowdownListener import ShowdownListener
+from ShowdownProtocol import Switch, Player, BattleEnd
+from SwitchEvents import SwitchEventQueue
+from NameIndex import NameIndex
+
+LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "battle.log")
+ROOM = "battle-gen8ou-1234"
+
+# What the recorded battle in battle.log should come out as
+EXPECTED_EVENTS = [
+    Player("p1", "Alice"),
+    Player("p2", "Bob"),
+    Switch("switch", "p1", "a", "Chompy (the great)", "Garchomp", "100/100"),
+    Switch("switch", "p2", "a", "Mime", "Mr. Mime", "100/100"),
+    Switch("switch", "p1", "a", "Koko", "Tapu Koko", "100/100"),
+    Switch("drag", "p2", "a", "Plate", "Arceus-Fire", "100/100"),
+    BattleEnd("Alice"),
+]
+
+
+def free_port():
+    """
+    :return: Int port nothing is listening on
+    """
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+async def collect_events(port, timeout=5):
+    """
+    Serves battle.log with serve_replay, joins its room with a ShowdownClient, and collects events until the battle
+    ends
+    :param port: Port to serve on
+    :param timeout: Seconds to wait for the battle to end
+    :return: List of (room, event)
+    """
+    server = asyncio.ensure_future(serve_replay(LOG_PATH, port=port))
+    events = []
+    ended = asyncio.Event()
+
+    def on_event(room, event):
+        events.append((room, event))
+        if isinstance(event, BattleEnd):
+            ended.set()
+
+    client = ShowdownClient(on_event, "ws://localhost:{}".format(port))
+    try:
+        for __ in range(50):    # Until the server is up
+            try:
+                await client.connect()
+                break
+            except OSError:
+                await asyncio.sleep(0.05)
+        await client.join(ROOM)
+        listening = asyncio.ensure_future(client.listen())
+        await asyncio.wait_for(ended.wait(), timeout)
+        await client.close()
+        await listening
+    finally:
+        server.cancel()
+    return events
+
+
+class FakeApp:
+    """
+    The parts of PokeApp ShowdownListener uses
+    """
+
+    def __init__(self):
+        self.showdown_mode = True
+        self.switch_events = SwitchEventQueue()
+        self.name_index = NameIndex({}, False)  # Unvalidated, so names are only guessed
+
+    class lookups:
+        @staticmethod
+        def prefetch(*args, **kwargs):
+            pass
+
+
+class ShowdownClientTest(unittest.TestCase):
+    def test_client_events(self):
+        events = asyncio.run(collect_events(free_port()))
+        self.assertTrue(all(room == ROOM for room, __ in events))
+        self.assertEqual([x for __, x in events if isinstance(x, (Switch, Player, BattleEnd))], EXPECTED_EVENTS)
+
+    def test_listener(self):
+        port = free_port()
+        server_loop = asyncio.new_event_loop()
+        server = server_loop.create_task(serve_replay(LOG_PATH, port=port))
+
+        def serve():
+            try:
+                server_loop.run_until_complete(server)
+            except asyncio.CancelledError:
+                pass
+
+        server_thread = threading.Thread(target=serve, daemon=True)
+        server_thread.start()
+
+        app = FakeApp()
+        listener = ShowdownListener(app, "ws://localhost:{}".format(port))
+        listener.start()
+        try:
+            time.sleep(0.2)
+            listener.watch("https://play.pokemonshowdown.com/" + ROOM)
+            rows = {}
+            deadline = time.time() + 5
+            while time.time() < deadline and rows.get(ROOM, (None,) * 6)[5] != "Alice won":
+                rows.update(listener.take_room_updates())
+                time.sleep(0.05)
+        finally:
+            listener.stop()
+            listener.join(2)
+            server_loop.call_soon_threadsafe(server.cancel)
+            server_thread.join(2)
+
+        self.assertEqual(rows[ROOM], (ROOM, "Alice", "tapu-koko", "Bob", "arceus-fire", "Alice won"))
+        switches = {x.slot: x.pokemon for x in app.switch_events.take_all()}
+        self.assertEqual(switches, {("p1", "a"): "tapu-koko", ("p2", "a"): "arceus-fire"})
+        self.assertFalse(listener.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()